@@ -1,87 +1,121 @@
-from flask import Flask, request, jsonify, send_file, redirect
+from flask import Flask, Request, request, jsonify, send_file, redirect, Response
 from flask_cors import CORS
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import os
 import tempfile
-from werkzeug.utils import secure_filename
 import base64
-import requests
 import json
 from furigana_az import FuriganaGenerator
+from translator_az import AzureTranslator
+from kanji_dict import KanjiDictionary
 import io
 import hashlib
 import uuid
 from auth import AuthManager
+from http_client import get_session, pool_stats
+from cache import DiskLRUCache, make_cache_key
+from jobs import JobQueue, QueueFull
 from urllib.parse import urlencode
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Uploads up to this size stay in memory while the form is parsed; only
+# larger bodies spill to a temporary file
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv('UPLOAD_SPOOL_MAX_BYTES', 16 * 1024 * 1024))
+
+class UploadRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Werkzeug's default spills parts over 500KB to disk, i.e. nearly every photo
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES, mode='rb+')
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)
 
 # Initialize authentication
 auth_manager = AuthManager(app)
 
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+# Whole request body, so it also bounds a /api/upload-batch chapter
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_BYTES', 16 * 1024 * 1024))
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}
 
+def is_truthy(value):
+    """Interpret an optional request flag such as ?translate_lines=1 or {"translate_lines": true}"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 furigana_gen = FuriganaGenerator()
+translator = AzureTranslator()
+kanji_dictionary = KanjiDictionary()
+MAX_KANJI_PER_LOOKUP = 500
+
+# Translation only needs the original text, so it runs alongside furigana generation
+translation_executor = ThreadPoolExecutor(max_workers=int(os.getenv('TRANSLATION_WORKERS', 8)))
+TRANSLATION_TIMEOUT = float(os.getenv('TRANSLATION_TIMEOUT', 10))
 
 def translate_text(text, source_lang='ja', target_lang='en'):
     """Translate text using Azure Translator Service"""
+    return translator.translate(text, source_lang, target_lang)
+
+TTS_VOICE = 'ja-JP-NanamiNeural'
+TTS_OUTPUT_FORMAT = 'audio-16khz-32kbitrate-mono-mp3'
+TTS_CACHE_MAX_AGE = int(os.getenv('TTS_CACHE_MAX_AGE', 7 * 24 * 3600))
+
+# Synthesized audio keyed by text, voice and format; replays skip Azure entirely
+tts_cache_max_bytes = int(os.getenv('TTS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+if tts_cache_max_bytes > 0:
+    tts_cache = DiskLRUCache(
+        os.getenv('TTS_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'yomi_tts_cache'),
+        tts_cache_max_bytes,
+        suffix='.mp3'
+    )
+else:
+    tts_cache = None
+
+# ?async=1 uploads run here; the worker count caps concurrent OCR jobs
+upload_jobs = JobQueue()
+
+# Pages of one /api/upload-batch request in flight at once, in both the Flask
+# and ASGI servers; each holds one Azure Read operation. The limit is per
+# request, so one long chapter does not hold up other batches.
+OCR_BATCH_CONCURRENCY = int(os.getenv('OCR_BATCH_CONCURRENCY', 8))
+OCR_BATCH_MAX_FILES = int(os.getenv('OCR_BATCH_MAX_FILES', 50))
+
+def tts_cache_key(text):
+    """Cache key and ETag for synthesized `text`; it fully determines the audio"""
+    return make_cache_key(TTS_VOICE, TTS_OUTPUT_FORMAT, text)
+
+def start_translation(text, source_lang='ja', target_lang='en'):
+    """Submit translate_text to the background pool and return (future, deadline)"""
+    future = translation_executor.submit(translate_text, text, source_lang, target_lang)
+    return future, time.monotonic() + TRANSLATION_TIMEOUT
+
+def start_line_translations(lines, source_lang='ja', target_lang='en'):
+    """Submit a batched translation of individual lines, like start_translation"""
+    future = translation_executor.submit(translator.translate_batch, lines, source_lang, target_lang)
+    return future, time.monotonic() + TRANSLATION_TIMEOUT
+
+def wait_for_translation(pending):
+    """Collect a translation started with start_translation/start_line_translations, or None once its deadline passes"""
+    future, deadline = pending
     try:
-        # Get Azure Translator credentials from environment
-        endpoint = os.getenv('TL_AZURE_ENDPOINT')
-        key = os.getenv('TL_AZURE_KEY')
-        region = "centralindia"  # You may need to adjust this based on your Azure region
-        
-        if not endpoint or not key:
-            print("Azure Translator credentials not found")
-            return None
-            
-        # Construct the request
-        path = '/translate'
-        constructed_url = endpoint + path
-        
-        params = {
-            'api-version': '3.0',
-            'from': source_lang,
-            'to': [target_lang]
-        }
-        
-        headers = {
-            'Ocp-Apim-Subscription-Key': key,
-            'Ocp-Apim-Subscription-Region': region,
-            'Content-type': 'application/json',
-            'X-ClientTraceId': str(uuid.uuid4())
-        }
-        
-        # Request body
-        body = [{
-            'text': text
-        }]
-        
-        response = requests.post(constructed_url, params=params, headers=headers, json=body)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result and len(result) > 0 and 'translations' in result[0]:
-                return result[0]['translations'][0]['text']
-        else:
-            print(f"Azure Translator API error: {response.status_code}")
-            print(f"Response: {response.text}")
-            
-    except Exception as e:
-        print(f"Translation error: {str(e)}")
-    
-    return None
+        return future.result(timeout=max(0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        print(f"Translation timed out after {TRANSLATION_TIMEOUT:g} seconds")
+        return None
 
-def azure_text_to_speech(text):
+def build_tts_request(text):
     """
-    Convert Japanese text to speech using Azure Speech Services
+    Build the Azure Speech Services request for `text`
+    
+    Returns:
+        (url, headers, body) for a POST whose response is the MP3 audio
     """
     from dotenv import load_dotenv
     load_dotenv()
@@ -99,20 +133,27 @@ def azure_text_to_speech(text):
     headers = {
         'Ocp-Apim-Subscription-Key': key,
         'Content-Type': 'application/ssml+xml',
-        'X-Microsoft-OutputFormat': 'audio-16khz-32kbitrate-mono-mp3',
+        'X-Microsoft-OutputFormat': TTS_OUTPUT_FORMAT,
         'User-Agent': 'Visual JP TTS Client'
     }
     
     # SSML format for Japanese text
     ssml = f"""
     <speak version='1.0' xml:lang='ja-JP'>
-        <voice xml:lang='ja-JP' xml:gender='Female' name='ja-JP-NanamiNeural'>
+        <voice xml:lang='ja-JP' xml:gender='Female' name='{TTS_VOICE}'>
             {text}
         </voice>
     </speak>
     """
     
-    response = requests.post(url, headers=headers, data=ssml.encode('utf-8'))
+    return url, headers, ssml.encode('utf-8')
+
+def azure_text_to_speech(text):
+    """
+    Convert Japanese text to speech using Azure Speech Services
+    """
+    url, headers, body = build_tts_request(text)
+    response = get_session().post(url, headers=headers, data=body)
     
     if response.status_code == 200:
         return response.content
@@ -128,11 +169,194 @@ def index():
         'endpoints': {
             'health': '/api/health',
             'upload': '/api/upload',
+            'upload_batch': '/api/upload-batch',
             'process_text': '/api/process-text',
-            'tts': '/api/tts'
+            'tts': '/api/tts',
+            'stats': '/api/stats'
         }
     })
 
+STREAM_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream'
+}
+
+def build_kanji_summary(lines_parts):
+    """Unique kanji from annotated lines, in reading order, with index metadata (None if unknown)"""
+    kanji_list = furigana_gen.extract_kanji(lines_parts)
+    metadata = kanji_dictionary.lookup_many(kanji_list)
+    return [{'char': kanji, 'data': metadata[kanji]} for kanji in kanji_list]
+
+def format_stream_event(event, data, mode):
+    """Serialize one streaming event as an NDJSON line or an SSE message"""
+    payload = json.dumps(data, ensure_ascii=False)
+    if mode == 'sse':
+        return f"event: {event}\ndata: {payload}\n\n"
+    return json.dumps({'event': event, **data}, ensure_ascii=False) + '\n'
+
+def build_upload_response(ocr_result, furigana_result, translated_text, line_translations=None, include_kanji=False):
+    """
+    Shape an upload's OCR, furigana and translation results for the frontend
+    
+    Args:
+        ocr_result: Parsed OCR result
+        furigana_result: add_furigana_to_ocr_result(ocr_result)
+        translated_text: Whole-text translation, or None
+        line_translations: Per-line translations in OCR order; None leaves them out
+        include_kanji: Attach the kanji summary
+    """
+    response_data = {
+        'success': True,
+        'original_text': ocr_result['full_text'],
+        'furigana_text': furigana_result['furigana_text'],
+        'translated_text': translated_text,
+        'pages': []
+    }
+    
+    if line_translations is not None:
+        line_translations = iter(line_translations)
+    
+    # Process each page for detailed display
+    for page in furigana_result['furigana_pages']:
+        page_data = {
+            'page_number': page['page_number'],
+            'lines': []
+        }
+        
+        for line in page['lines']:
+            line_data = {
+                'original': line['original_text'],
+                'furigana': line['furigana_text'],
+                'parts': line['furigana_parts'],
+                'confidence': line['confidence']
+            }
+            if line_translations is not None:
+                line_data['translation'] = next(line_translations, None)
+            page_data['lines'].append(line_data)
+        
+        response_data['pages'].append(page_data)
+    
+    if include_kanji:
+        response_data['kanji'] = build_kanji_summary(
+            line['furigana_parts'] for page in furigana_result['furigana_pages'] for line in page['lines']
+        )
+    
+    return response_data
+
+def ocr_event_data(ocr_result):
+    """Payload of the streaming 'ocr' event"""
+    return {
+        'original_text': ocr_result['full_text'],
+        'reading_direction': ocr_result['reading_direction'],
+        'pages': [
+            {'page_number': page['page_number'], 'line_count': len(page['lines'])}
+            for page in ocr_result['pages']
+        ]
+    }
+
+def line_event_data(page, line_index, line_info, furigana_line):
+    """Payload of a streaming 'line' event"""
+    return {
+        'page_number': page['page_number'],
+        'line_index': line_index,
+        'original': line_info['text'],
+        'furigana': furigana_line['text'],
+        'parts': furigana_line['parts'],
+        'confidence': line_info['confidence']
+    }
+
+def stream_upload_events(image_data, mode, include_kanji=False):
+    """
+    Process an uploaded image, yielding results as soon as each stage finishes:
+    'ocr' with the recognized text, one 'line' per furigana line, 'translation',
+    then 'done' (or 'error').
+    """
+    try:
+        ocr_result = furigana_gen.ocr.extract_text_from_image(image_data)
+        
+        original_text = ocr_result['full_text']
+        pending_translation = start_translation(original_text, 'ja', 'en')
+        
+        yield format_stream_event('ocr', ocr_event_data(ocr_result), mode)
+        
+        furigana_lines = []
+        lines_parts = []
+        for page in ocr_result['pages']:
+            page_lines = [line_info['text'] for line_info in page['lines']]
+            annotated = furigana_gen.add_furigana_to_lines(page_lines)
+            
+            for line_index, (line_info, furigana_line) in enumerate(zip(page['lines'], annotated)):
+                furigana_lines.append(furigana_line['text'])
+                lines_parts.append(furigana_line['parts'])
+                yield format_stream_event('line', line_event_data(page, line_index, line_info, furigana_line), mode)
+        
+        yield format_stream_event('translation', {
+            'translated_text': wait_for_translation(pending_translation)
+        }, mode)
+        
+        done_data = {
+            'success': True,
+            'furigana_text': '\n'.join(furigana_lines)
+        }
+        if include_kanji:
+            done_data['kanji'] = build_kanji_summary(lines_parts)
+        
+        yield format_stream_event('done', done_data, mode)
+        
+    except Exception as e:
+        yield format_stream_event('error', {'error': f'Processing failed: {str(e)}'}, mode)
+
+def process_upload(image, translate_lines=False, include_kanji=False):
+    """
+    OCR an image, annotate it with furigana and translate it
+    
+    Args:
+        image: Image bytes or a binary file object, e.g. an upload's stream
+    
+    Returns:
+        dict: The /api/upload response body
+    """
+    ocr_result = furigana_gen.ocr.extract_text_from_image(image)
+    
+    original_text = ocr_result['full_text']
+    pending_translation = start_translation(original_text, 'ja', 'en')
+    
+    # Optional per-line translations, sent to Azure as one batched request
+    if translate_lines:
+        pending_line_translations = start_line_translations(ocr_result['lines'], 'ja', 'en')
+    
+    result = furigana_gen.add_furigana_to_ocr_result(ocr_result)
+    translated_text = wait_for_translation(pending_translation)
+    
+    line_translations = None
+    if translate_lines:
+        line_translations = wait_for_translation(pending_line_translations) or []
+    
+    return build_upload_response(ocr_result, result, translated_text, line_translations, include_kanji)
+
+def enqueue_upload(image_data, translate_lines=False, include_kanji=False):
+    """
+    Queue an upload as a background job
+    
+    Args:
+        image_data (bytes): The image; jobs outlive the request, so not its stream
+    
+    Returns:
+        (response body, status code, headers) for the 202/503 reply
+    """
+    try:
+        job_id = upload_jobs.submit(process_upload, image_data, translate_lines, include_kanji)
+    except QueueFull:
+        return {'error': 'Too many uploads are being processed, please try again shortly'}, 503, {'Retry-After': '5'}
+    
+    status_url = f'/api/jobs/{job_id}'
+    return {
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': status_url
+    }, 202, {'Location': status_url}
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     try:
@@ -147,86 +371,183 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Please upload an image.'}), 400
         
-        filename = secure_filename(file.filename)
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, filename)
-        file.save(temp_path)
-        
-        try:
-            result = furigana_gen.extract_text_with_furigana(temp_path)
-            
-            original_text = result['original_ocr']['full_text']
-            translated_text = translate_text(original_text, 'ja', 'en')
-            
-            # Format response for frontend
-            response_data = {
-                'success': True,
-                'original_text': original_text,
-                'furigana_text': result['furigana_text'],
-                'translated_text': translated_text,
-                'pages': []
-            }
-            
-            # Process each page for detailed display
-            for page in result['furigana_pages']:
-                page_data = {
-                    'page_number': page['page_number'],
-                    'lines': []
-                }
-                
-                for line in page['lines']:
-                    line_data = {
-                        'original': line['original_text'],
-                        'furigana': line['furigana_text'],
-                        'parts': line['furigana_parts'],
-                        'confidence': line['confidence']
-                    }
-                    page_data['lines'].append(line_data)
-                
-                response_data['pages'].append(page_data)
-            
-            return jsonify(response_data)
-            
-        finally:
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        include_kanji = is_truthy(request.args.get('include_kanji') or request.form.get('include_kanji'))
+        translate_lines = is_truthy(request.args.get('translate_lines') or request.form.get('translate_lines'))
+        
+        # Opt-in background processing: reply 202 with a job id to poll at /api/jobs/<id>
+        if is_truthy(request.args.get('async') or request.form.get('async')):
+            body, status_code, headers = enqueue_upload(file.read(), translate_lines, include_kanji)
+            return jsonify(body), status_code, headers
+        
+        # Opt-in streaming: ?stream=ndjson or ?stream=sse (also accepted as a form field)
+        stream_mode = (request.args.get('stream') or request.form.get('stream') or '').lower()
+        if stream_mode in STREAM_MIMETYPES:
+            # The upload stream is closed with the request, before the response finishes streaming
+            return Response(
+                stream_upload_events(file.read(), stream_mode, include_kanji),
+                mimetype=STREAM_MIMETYPES[stream_mode],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        return jsonify(process_upload(file.stream, translate_lines, include_kanji))
+    
+    except Exception as e:
+        return jsonify({'error': f'Processing failed: {str(e)}'}), 500
+
+def validate_batch_files(files):
+    """Return an error message for an unusable /api/upload-batch file list, or None"""
+    if not files:
+        return 'No files provided'
+    if len(files) > OCR_BATCH_MAX_FILES:
+        return f'Too many files, the limit is {OCR_BATCH_MAX_FILES} per batch'
+    invalid = [file.filename for file in files if not allowed_file(file.filename or '')]
+    if invalid:
+        return f"Invalid file type: {', '.join(invalid)}. Please upload images."
+    return None
+
+def batch_page_result(index, filename, page_result=None, error=None):
+    """One entry of the /api/upload-batch results list"""
+    if error is not None:
+        return {'index': index, 'filename': filename, 'success': False, 'error': f'Processing failed: {error}'}
+    return {'index': index, 'filename': filename, **page_result}
+
+def batch_response(results):
+    """Wrap per-page results, already in page order, into the /api/upload-batch body"""
+    failed = sum(1 for page_result in results if not page_result['success'])
+    return {
+        'success': failed < len(results),
+        'results': results,
+        'succeeded': len(results) - failed,
+        'failed': failed
+    }
+
+def process_batch_page(index, filename, image, translate_lines, include_kanji):
+    """OCR one batch page; failures are reported in its result instead of failing the batch"""
+    try:
+        return batch_page_result(index, filename, process_upload(image, translate_lines, include_kanji))
+    except Exception as e:
+        return batch_page_result(index, filename, error=str(e))
+
+@app.route('/api/upload-batch', methods=['POST'])
+def upload_batch():
+    """
+    OCR many images (e.g. the pages of a chapter) in one request
+    
+    Pages go to Azure concurrently, up to OCR_BATCH_CONCURRENCY at a time for
+    this request, and each page's furigana and translation start as soon as
+    its OCR finishes.
+    Results come back in upload order, one /api/upload-style entry per page.
+    """
+    try:
+        files = request.files.getlist('files')
+        error = validate_batch_files(files)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        include_kanji = is_truthy(request.args.get('include_kanji') or request.form.get('include_kanji'))
+        translate_lines = is_truthy(request.args.get('translate_lines') or request.form.get('translate_lines'))
+        
+        # A pool of this request's own, so its pages never wait behind another
+        # batch; each worker reads its page straight from the parsed upload
+        with ThreadPoolExecutor(max_workers=min(OCR_BATCH_CONCURRENCY, len(files)), thread_name_prefix='ocr-batch') as executor:
+            futures = [
+                executor.submit(process_batch_page, index, file.filename, file.stream, translate_lines, include_kanji)
+                for index, file in enumerate(files)
+            ]
+            return jsonify(batch_response([future.result() for future in futures]))
     
     except Exception as e:
         return jsonify({'error': f'Processing failed: {str(e)}'}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a background upload; includes the upload response once it has succeeded"""
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    body = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    }
+    if job['status'] == 'succeeded':
+        body['result'] = job['result']
+    elif job['status'] == 'failed':
+        body['error'] = f"Processing failed: {job['error']}"
+    
+    return jsonify(body)
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy', 'message': 'Furigana API is running'})
 
-@app.route('/api/tts', methods=['POST'])
+@app.route('/api/stats', methods=['GET'])
+def stats():
+    """Report cache counters so we can see how much work they save"""
+    return jsonify({
+        'ocr_cache': furigana_gen.ocr.cache_stats(),
+        'ocr_preprocess': furigana_gen.ocr.preprocessor.stats(),
+        'reading_cache': furigana_gen.reading_cache.stats(),
+        'tts_cache': tts_cache.stats() if tts_cache is not None else None,
+        'translation_cache': translator.cache_stats(),
+        'http_pool': pool_stats(),
+        'password_hasher': auth_manager.password_hasher.stats(),
+        'upload_jobs': upload_jobs.stats()
+    })
+
+@app.route('/api/tts', methods=['GET', 'POST'])
 def text_to_speech():
     """
     Convert Japanese text to speech using Azure Speech Services
+    
+    Accepts JSON { text } via POST or ?text= via GET. Audio is cached by text,
+    voice and format and served with an ETag so browsers can reuse it too.
     """
     try:
-        data = request.get_json()
-        text = data.get('text', '').strip()
+        if request.method == 'GET':
+            text = request.args.get('text', '').strip()
+        else:
+            data = request.get_json()
+            text = data.get('text', '').strip()
         
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        # Generate audio using Azure Speech Services
-        audio_content = azure_text_to_speech(text)
+        cache_key = tts_cache_key(text)
         
-        # Create a hash of the text for the filename
-        text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
-        
-        # Create audio buffer
-        audio_buffer = io.BytesIO(audio_content)
-        audio_buffer.seek(0)
-        
-        # Return the audio file
-        return send_file(
-            audio_buffer,
-            mimetype='audio/mpeg',
-            as_attachment=False,
-            download_name=f'tts_{text_hash}.mp3'
-        )
+        # The key fully determines the audio, so a matching ETag needs no synthesis
+        if cache_key in request.if_none_match:
+            response = Response(status=304)
+        else:
+            audio_content = tts_cache.get(cache_key) if tts_cache is not None else None
+            
+            if audio_content is None:
+                # Generate audio using Azure Speech Services
+                audio_content = azure_text_to_speech(text)
+                if tts_cache is not None:
+                    tts_cache.set(cache_key, audio_content)
+            
+            # Create a hash of the text for the filename
+            text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
+            
+            # Create audio buffer
+            audio_buffer = io.BytesIO(audio_content)
+            audio_buffer.seek(0)
+            
+            # Return the audio file
+            response = send_file(
+                audio_buffer,
+                mimetype='audio/mpeg',
+                as_attachment=False,
+                download_name=f'tts_{text_hash}.mp3'
+            )
+        
+        response.set_etag(cache_key)
+        response.headers['Cache-Control'] = f'public, max-age={TTS_CACHE_MAX_AGE}, immutable'
+        return response
         
     except Exception as e:
         print(f"TTS generation failed: {str(e)}")
@@ -268,10 +589,17 @@ def process_text():
         if not sentences:
             sentences = [text]
         
+        # Translate the complete original text while furigana is generated
+        pending_translation = start_translation(text, 'ja', 'en')
+        
+        # Optional per-sentence translations, sent to Azure as one batched request
+        translate_lines = is_truthy(data.get('translate_lines'))
+        if translate_lines:
+            pending_line_translations = start_line_translations(sentences, 'ja', 'en')
+        
         # Process each sentence with furigana
         processed_lines = []
-        for i, sentence in enumerate(sentences):
-            result = furigana_gen._add_furigana_to_text(sentence)
+        for sentence, result in zip(sentences, furigana_gen.add_furigana_to_lines(sentences)):
             processed_lines.append({
                 'original': sentence,
                 'furigana': result['text'],
@@ -279,8 +607,12 @@ def process_text():
                 'confidence': 1.0
             })
         
-        # Translate the complete original text
-        translated_text = translate_text(text, 'ja', 'en')
+        translated_text = wait_for_translation(pending_translation)
+        
+        if translate_lines:
+            line_translations = wait_for_translation(pending_line_translations) or [None] * len(processed_lines)
+            for line, line_translation in zip(processed_lines, line_translations):
+                line['translation'] = line_translation
         
         # Create furigana_text by joining all processed sentences
         furigana_text = ' '.join([line['furigana'] for line in processed_lines])
@@ -297,6 +629,9 @@ def process_text():
             }]
         }
         
+        if is_truthy(data.get('include_kanji')):
+            response_data['kanji'] = build_kanji_summary(line['parts'] for line in processed_lines)
+        
         return jsonify(response_data)
         
     except Exception as e:
@@ -309,6 +644,8 @@ def register():
     try:
         data = request.get_json()
         result, status_code = auth_manager.register_user(data)
+        if status_code == 429:
+            return jsonify(result), status_code, {'Retry-After': '1'}
         return jsonify(result), status_code
     except Exception as e:
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
@@ -319,6 +656,8 @@ def login():
     try:
         data = request.get_json()
         result, status_code = auth_manager.login_user(data)
+        if status_code == 429:
+            return jsonify(result), status_code, {'Retry-After': '1'}
         return jsonify(result), status_code
     except Exception as e:
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
@@ -401,13 +740,13 @@ def google_callback():
     }
 
     try:
-        token_resp = requests.post(token_url, data=token_payload)
+        token_resp = get_session().post(token_url, data=token_payload)
         token_resp.raise_for_status()
         token_data = token_resp.json()
         id_token = token_data.get('id_token')
 
         # Use id_token to get user info
-        userinfo_resp = requests.get('https://www.googleapis.com/oauth2/v3/userinfo', headers={
+        userinfo_resp = get_session().get('https://www.googleapis.com/oauth2/v3/userinfo', headers={
             'Authorization': f"Bearer {token_data.get('access_token')}"
         })
         userinfo_resp.raise_for_status()
@@ -462,18 +801,62 @@ def save_kanji():
         if not kanji_list:
             return jsonify({'success': False, 'message': 'No kanji provided'}), 400
         
+        # Fill in metadata the client did not send from the local index
+        for kanji_info in kanji_list:
+            if not (kanji_info.get('data') or {}).get('success'):
+                info = kanji_dictionary.lookup(kanji_info.get('char', ''))
+                if info is not None:
+                    kanji_info['data'] = {'success': True, 'data': info}
+        
         result, status_code = auth_manager.save_kanji_to_collection(user_id, kanji_list)
         return jsonify(result), status_code
     except Exception as e:
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
+@app.route('/api/kanji/info', methods=['GET'])
+def kanji_info():
+    """Look up metadata for many kanji at once, e.g. ?chars=日本語"""
+    try:
+        # Unique characters in request order
+        chars = list(dict.fromkeys(char for char in request.args.get('chars', '') if not char.isspace() and char != ','))
+        
+        if not chars:
+            return jsonify({'success': False, 'message': 'No kanji provided'}), 400
+        
+        # Refuse oversized requests before doing any lookups
+        if len(chars) > MAX_KANJI_PER_LOOKUP:
+            return jsonify({'success': False, 'message': f'At most {MAX_KANJI_PER_LOOKUP} kanji per request'}), 400
+        
+        results = kanji_dictionary.lookup_many(chars)
+        
+        return jsonify({
+            'success': True,
+            'kanji': results,
+            'missing': [char for char, info in results.items() if info is None]
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
 @app.route('/api/kanji/saved', methods=['GET'])
 @jwt_required()
 def get_saved_kanji():
-    """Get user's saved kanji collection"""
+    """Get user's saved kanji collection, optionally paginated (?sort=added|jlpt|strokes&order=asc|desc&limit=&cursor=)"""
     try:
         user_id = get_jwt_identity()
-        result, status_code = auth_manager.get_user_kanji_collection(user_id)
+        limit = request.args.get('limit')
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Limit must be an integer'}), 400
+        
+        result, status_code = auth_manager.get_user_kanji_collection(
+            user_id,
+            sort=request.args.get('sort', 'added'),
+            order=request.args.get('order', 'desc'),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
         return jsonify(result), status_code
     except Exception as e:
         return jsonify({'success': False, 'message': 'Internal server error'}), 500
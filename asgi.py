@@ -0,0 +1,281 @@
+"""
+Async serving mode for the Yomi API
+
+    uvicorn asgi:app --host 0.0.0.0 --port 80
+    gunicorn -k uvicorn.workers.UvicornWorker --workers 2 --bind 0.0.0.0:80 asgi:app
+
+/api/upload and /api/tts are served natively here: waiting on Azure (OCR
+polling, translation, speech synthesis) suspends a coroutine instead of
+holding a worker, so one process can keep hundreds of uploads in flight.
+Every other route is forwarded unchanged to the Flask app in app.py.
+"""
+import os
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.formparsers import MultiPartParser
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+from app import (
+    app as flask_app, furigana_gen, translator, tts_cache,
+    allowed_file, is_truthy, enqueue_upload, build_upload_response,
+    validate_batch_files, batch_page_result, batch_response, build_kanji_summary, build_tts_request, tts_cache_key,
+    format_stream_event, ocr_event_data, line_event_data,
+    STREAM_MIMETYPES, TRANSLATION_TIMEOUT, TTS_CACHE_MAX_AGE, OCR_BATCH_CONCURRENCY, UPLOAD_SPOOL_MAX_BYTES
+)
+from http_client import CONNECT_TIMEOUT, READ_TIMEOUT
+
+# Same in-memory threshold as the Flask app; Starlette's default spools parts over 1MB to disk
+MultiPartParser.spool_max_size = UPLOAD_SPOOL_MAX_BYTES
+
+# Furigana generation is CPU-bound and shares one MeCab tagger, so it runs
+# off the event loop on a single thread
+furigana_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='furigana')
+
+async def run_furigana(func, *args):
+    """Run a furigana_gen call on furigana_executor without blocking the loop"""
+    return await asyncio.get_running_loop().run_in_executor(furigana_executor, func, *args)
+
+@asynccontextmanager
+async def lifespan(app):
+    # One connection pool per process for every outbound Azure call
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv('ASGI_HTTP_MAX_CONNECTIONS', 200)),
+            max_keepalive_connections=int(os.getenv('ASGI_HTTP_MAX_KEEPALIVE', 50))
+        )
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+def start_translation_async(coroutine):
+    """Schedule a translation coroutine and return (task, deadline), like app.start_translation"""
+    return asyncio.ensure_future(coroutine), time.monotonic() + TRANSLATION_TIMEOUT
+
+async def wait_for_translation_async(pending):
+    """Await a translation from start_translation_async, or None once its deadline passes"""
+    task, deadline = pending
+    try:
+        return await asyncio.wait_for(task, timeout=max(0, deadline - time.monotonic()))
+    except asyncio.TimeoutError:
+        print(f"Translation timed out after {TRANSLATION_TIMEOUT:g} seconds")
+        return None
+
+async def process_upload_async(image_data, client, translate_lines=False, include_kanji=False):
+    """Async counterpart of app.process_upload, returning the /api/upload response body"""
+    ocr_result = await furigana_gen.ocr.extract_text_from_image_async(image_data, client)
+
+    pending_translation = start_translation_async(
+        translator.translate_async(ocr_result['full_text'], 'ja', 'en', client)
+    )
+
+    if translate_lines:
+        pending_line_translations = start_translation_async(
+            translator.translate_batch_async(ocr_result['lines'], 'ja', 'en', client)
+        )
+
+    result = await run_furigana(furigana_gen.add_furigana_to_ocr_result, ocr_result)
+    translated_text = await wait_for_translation_async(pending_translation)
+
+    line_translations = None
+    if translate_lines:
+        line_translations = await wait_for_translation_async(pending_line_translations) or []
+
+    return build_upload_response(ocr_result, result, translated_text, line_translations, include_kanji)
+
+async def stream_upload_events_async(image_data, mode, include_kanji, client):
+    """Async counterpart of app.stream_upload_events, yielding the same events"""
+    pending_translation = None
+    try:
+        ocr_result = await furigana_gen.ocr.extract_text_from_image_async(image_data, client)
+
+        pending_translation = start_translation_async(
+            translator.translate_async(ocr_result['full_text'], 'ja', 'en', client)
+        )
+
+        yield format_stream_event('ocr', ocr_event_data(ocr_result), mode)
+
+        furigana_lines = []
+        lines_parts = []
+        for page in ocr_result['pages']:
+            page_lines = [line_info['text'] for line_info in page['lines']]
+            annotated = await run_furigana(furigana_gen.add_furigana_to_lines, page_lines)
+
+            for line_index, (line_info, furigana_line) in enumerate(zip(page['lines'], annotated)):
+                furigana_lines.append(furigana_line['text'])
+                lines_parts.append(furigana_line['parts'])
+                yield format_stream_event('line', line_event_data(page, line_index, line_info, furigana_line), mode)
+
+        yield format_stream_event('translation', {
+            'translated_text': await wait_for_translation_async(pending_translation)
+        }, mode)
+
+        done_data = {
+            'success': True,
+            'furigana_text': '\n'.join(furigana_lines)
+        }
+        if include_kanji:
+            done_data['kanji'] = build_kanji_summary(lines_parts)
+
+        yield format_stream_event('done', done_data, mode)
+
+    except Exception as e:
+        yield format_stream_event('error', {'error': f'Processing failed: {str(e)}'}, mode)
+
+    finally:
+        # Client went away or processing failed before the translation was collected
+        if pending_translation is not None:
+            pending_translation[0].cancel()
+
+async def upload_file(request):
+    """Async /api/upload, accepting the same form fields and flags as the Flask route"""
+    try:
+        content_length = int(request.headers.get('content-length') or 0)
+        if content_length > flask_app.config['MAX_CONTENT_LENGTH']:
+            return JSONResponse({'error': 'File too large'}, status_code=413)
+
+        form = await request.form()
+        file = form.get('file')
+
+        if file is None or isinstance(file, str):
+            return JSONResponse({'error': 'No file provided'}, status_code=400)
+
+        if file.filename == '':
+            return JSONResponse({'error': 'No file selected'}, status_code=400)
+
+        if not allowed_file(file.filename):
+            return JSONResponse({'error': 'Invalid file type. Please upload an image.'}, status_code=400)
+
+        image_data = await file.read()
+        client = request.app.state.http
+
+        include_kanji = is_truthy(request.query_params.get('include_kanji') or form.get('include_kanji'))
+        translate_lines = is_truthy(request.query_params.get('translate_lines') or form.get('translate_lines'))
+
+        # Background jobs share the Flask app's queue, so /api/jobs/<id> (served by Flask) sees them
+        if is_truthy(request.query_params.get('async') or form.get('async')):
+            # Submitting writes the job record to disk, so it runs off the loop
+            body, status_code, headers = await asyncio.get_running_loop().run_in_executor(
+                None, enqueue_upload, image_data, translate_lines, include_kanji
+            )
+            return JSONResponse(body, status_code=status_code, headers=headers)
+
+        stream_mode = (request.query_params.get('stream') or form.get('stream') or '').lower()
+        if stream_mode in STREAM_MIMETYPES:
+            return StreamingResponse(
+                stream_upload_events_async(image_data, stream_mode, include_kanji, client),
+                media_type=STREAM_MIMETYPES[stream_mode],
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
+        return JSONResponse(await process_upload_async(image_data, client, translate_lines, include_kanji))
+
+    except Exception as e:
+        return JSONResponse({'error': f'Processing failed: {str(e)}'}, status_code=500)
+
+async def upload_batch(request):
+    """Async /api/upload-batch: pages run concurrently, up to OCR_BATCH_CONCURRENCY per request"""
+    try:
+        content_length = int(request.headers.get('content-length') or 0)
+        if content_length > flask_app.config['MAX_CONTENT_LENGTH']:
+            return JSONResponse({'error': 'File too large'}, status_code=413)
+
+        form = await request.form()
+        files = [file for file in form.getlist('files') if not isinstance(file, str)]
+        error = validate_batch_files(files)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+
+        include_kanji = is_truthy(request.query_params.get('include_kanji') or form.get('include_kanji'))
+        translate_lines = is_truthy(request.query_params.get('translate_lines') or form.get('translate_lines'))
+        client = request.app.state.http
+        slots = asyncio.Semaphore(OCR_BATCH_CONCURRENCY)
+
+        async def process_page(index, file):
+            async with slots:
+                try:
+                    image_data = await file.read()
+                    page_result = await process_upload_async(image_data, client, translate_lines, include_kanji)
+                    return batch_page_result(index, file.filename, page_result)
+                except Exception as e:
+                    return batch_page_result(index, file.filename, error=str(e))
+
+        # gather keeps upload order regardless of which page finishes first
+        results = await asyncio.gather(*(process_page(index, file) for index, file in enumerate(files)))
+        return JSONResponse(batch_response(list(results)))
+
+    except Exception as e:
+        return JSONResponse({'error': f'Processing failed: {str(e)}'}, status_code=500)
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value lists `etag` (or is '*')"""
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+async def text_to_speech(request):
+    """Async /api/tts with the same caching and ETag behaviour as the Flask route"""
+    try:
+        if request.method == 'GET':
+            text = request.query_params.get('text', '').strip()
+        else:
+            data = await request.json()
+            text = data.get('text', '').strip()
+
+        if not text:
+            return JSONResponse({'error': 'No text provided'}, status_code=400)
+
+        cache_key = tts_cache_key(text)
+        headers = {
+            'ETag': f'"{cache_key}"',
+            'Cache-Control': f'public, max-age={TTS_CACHE_MAX_AGE}, immutable'
+        }
+
+        if etag_matches(request.headers.get('if-none-match', ''), headers['ETag']):
+            return Response(status_code=304, headers=headers)
+
+        # The disk cache reads files under a lock shared with Flask's threads; keep it off the loop
+        loop = asyncio.get_running_loop()
+        audio_content = await loop.run_in_executor(None, tts_cache.get, cache_key) if tts_cache is not None else None
+
+        if audio_content is None:
+            url, tts_headers, body = build_tts_request(text)
+            response = await request.app.state.http.post(url, headers=tts_headers, content=body)
+            if response.status_code != 200:
+                raise Exception(f"Azure TTS request failed: {response.status_code} - {response.text}")
+            audio_content = response.content
+            if tts_cache is not None:
+                await loop.run_in_executor(None, tts_cache.set, cache_key, audio_content)
+
+        text_hash = hashlib.md5(text.encode('utf-8')).hexdigest()
+        headers['Content-Disposition'] = f'inline; filename=tts_{text_hash}.mp3'
+        return Response(audio_content, media_type='audio/mpeg', headers=headers)
+
+    except Exception as e:
+        print(f"TTS generation failed: {str(e)}")
+        return JSONResponse({'error': f'TTS generation failed: {str(e)}'}, status_code=500)
+
+app = Starlette(
+    routes=[
+        Route('/api/upload', upload_file, methods=['POST']),
+        Route('/api/upload-batch', upload_batch, methods=['POST']),
+        Route('/api/tts', text_to_speech, methods=['GET', 'POST']),
+        # Auth, kanji, stats and the rest stay on Flask, run in a thread pool
+        Mount('/', app=WSGIMiddleware(flask_app, workers=int(os.getenv('ASGI_WSGI_WORKERS', 10))))
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan
+)
@@ -3,17 +3,39 @@ Authentication module for Yomi app
 Provides secure user authentication with MongoDB and JWT
 """
 import os
-import bcrypt
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from flask import jsonify, request
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 import re
 from datetime import timedelta
 from dotenv import load_dotenv
 
+from password_hasher import PasswordHasher, HasherBusy
+
 # Load environment variables
 load_dotenv()
 
+# Sort options for the saved kanji listing -> indexed field
+KANJI_SORT_FIELDS = {
+    'added': 'added_at',
+    'jlpt': 'jlpt',
+    'strokes': 'stroke_count'
+}
+# Sort fields some kanji have no value for -> flag marking the value as present.
+# Listings sort on the flag first, so unknown JLPT levels and stroke counts
+# come last in either direction.
+KANJI_SORT_PRESENCE = {
+    'jlpt': 'has_jlpt',
+    'stroke_count': 'has_stroke_count'
+}
+MAX_KANJI_PAGE_SIZE = 200
+
+# User document fields each query needs. Everything goes through
+# AuthManager._find_user so no read pulls back the whole user document.
+PROFILE_FIELDS = ('email', 'username', 'full_name', 'profile_settings', 'study_progress')
+LOGIN_FIELDS = PROFILE_FIELDS + ('password',)
+
 class AuthManager:
     def __init__(self, app):
         self.app = app
@@ -25,6 +47,9 @@ class AuthManager:
         
         self.jwt = JWTManager(app)
         
+        # Caps concurrent bcrypt work and answers login bursts with 429
+        self.password_hasher = PasswordHasher()
+        
         # Setup MongoDB connection
         try:
             mongodb_uri = os.getenv('MONGODB_URI')
@@ -45,12 +70,95 @@ class AuthManager:
             # Create indexes for better performance
             self.users_collection.create_index("email", unique=True)
             self.users_collection.create_index("username", unique=True)
+            self._ensure_username_lower_index()
+            
+            # Saved kanji live in their own collection so user documents stay
+            # small and the dashboard can page through them by index
+            self.saved_kanji_collection = self.db.saved_kanji
+            self.saved_kanji_collection.create_index([("user_id", 1), ("char", 1)], unique=True)
+            self.saved_kanji_collection.create_index([("user_id", 1), ("added_at", 1), ("_id", 1)])
+            self._ensure_saved_kanji_sort_indexes()
             
         except Exception as e:
             print(f"MongoDB connection failed: {e}")
             self.client = None
             self.db = None
             self.users_collection = None
+            self.saved_kanji_collection = None
+    
+    def _ensure_saved_kanji_sort_indexes(self):
+        """
+        Backfill the JLPT/stroke presence flags on older saved kanji and index them
+        
+        Both orders sort on (flag descending, value, _id), which an index only
+        serves when its directions match the sort or are all reversed, so each
+        field gets one index per order.
+        """
+        for sort_field, presence_field in KANJI_SORT_PRESENCE.items():
+            # Values were stored as 0 when missing; real levels and counts start at 1
+            self.saved_kanji_collection.update_many(
+                {presence_field: {'$exists': False}, sort_field: {'$gt': 0}},
+                {'$set': {presence_field: 1}}
+            )
+            self.saved_kanji_collection.update_many(
+                {presence_field: {'$exists': False}},
+                {'$set': {presence_field: 0}}
+            )
+            
+            for direction in (1, -1):
+                self.saved_kanji_collection.create_index(
+                    [("user_id", 1), (presence_field, -1), (sort_field, direction), ("_id", direction)]
+                )
+            
+            # Superseded by the indexes above
+            try:
+                self.saved_kanji_collection.drop_index([("user_id", 1), (sort_field, 1), ("_id", 1)])
+            except Exception:
+                pass
+    
+    def _ensure_username_lower_index(self):
+        """
+        Backfill username_lower on older accounts and index it
+        
+        Login and availability checks match usernames case-insensitively
+        through this field, so each is a single lookup on one unique index.
+        """
+        from pymongo import UpdateOne
+        from pymongo.errors import OperationFailure
+        
+        operations = [
+            UpdateOne({'_id': user['_id']}, {'$set': {'username_lower': user['username'].lower()}})
+            for user in self.users_collection.find(
+                {'username_lower': {'$exists': False}, 'username': {'$type': 'string'}},
+                {'username': 1}
+            )
+        ]
+        if operations:
+            self.users_collection.bulk_write(operations, ordered=False)
+            print(f"Backfilled username_lower for {len(operations)} users")
+        
+        try:
+            self.users_collection.create_index("username_lower", unique=True)
+        except OperationFailure as e:
+            # Existing usernames that differ only by case; keep lookups indexed
+            # and leave the duplicates to be renamed by hand
+            print(f"Could not create unique username_lower index: {e}")
+            self.users_collection.create_index("username_lower")
+    
+    def _find_user(self, query, fields=()):
+        """
+        Find one user document, returning only the requested fields
+        
+        Args:
+            query (dict): MongoDB filter
+            fields (tuple): Field names to return; _id is always included,
+                so an empty tuple is an existence check
+        
+        Returns:
+            dict: The projected user document, or None if no user matched
+        """
+        projection = {field: 1 for field in fields} or {'_id': 1}
+        return self.users_collection.find_one(query, projection)
     
     def validate_email(self, email):
         """Validate email format"""
@@ -64,14 +172,38 @@ class AuthManager:
         
         return True, "Password is valid"
     
+    def validate_username(self, username):
+        """Validate username format; login tells emails from usernames by the '@'"""
+        if len(username) < 3 or len(username) > 20:
+            return False, "Username must be between 3 and 20 characters"
+        
+        if not re.match(r'^[a-zA-Z0-9_]+$', username):
+            return False, "Username can only contain letters, numbers, and underscores"
+        
+        return True, "Username is valid"
+    
     def hash_password(self, password):
         """Hash password using bcrypt"""
-        salt = bcrypt.gensalt(rounds=12)
-        return bcrypt.hashpw(password.encode('utf-8'), salt)
+        return self.password_hasher.hash(password)
     
     def verify_password(self, password, hashed_password):
         """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+        return self.password_hasher.verify(password, hashed_password)
+    
+    def _rehash_password_if_needed(self, user, password):
+        """Re-hash a verified password stored with an outdated bcrypt cost"""
+        if not self.password_hasher.needs_rehash(user['password']):
+            return
+        try:
+            new_hash = self.hash_password(password)
+        except HasherBusy:
+            # Not urgent; the next login will try again
+            return
+        # Only replace the hash we verified, in case the password changed meanwhile
+        self.users_collection.update_one(
+            {'_id': user['_id'], 'password': user['password']},
+            {'$set': {'password': new_hash}}
+        )
     
     def register_user(self, data):
         """Register a new user"""
@@ -94,11 +226,9 @@ class AuthManager:
                 return {'success': False, 'message': 'Invalid email format'}, 400
             
             # Validate username
-            if len(username) < 3 or len(username) > 20:
-                return {'success': False, 'message': 'Username must be between 3 and 20 characters'}, 400
-            
-            if not re.match(r'^[a-zA-Z0-9_]+$', username):
-                return {'success': False, 'message': 'Username can only contain letters, numbers, and underscores'}, 400
+            is_valid, message = self.validate_username(username)
+            if not is_valid:
+                return {'success': False, 'message': message}, 400
             
             # Validate password
             is_valid, message = self.validate_password(password)
@@ -106,7 +236,7 @@ class AuthManager:
                 return {'success': False, 'message': message}, 400
             
             # Check if user already exists
-            existing_user = self.users_collection.find_one({'$or': [{'email': email}, {'username': username}]})
+            existing_user = self._find_user({'$or': [{'email': email}, {'username_lower': username.lower()}]})
             if existing_user is not None:
                 return {'success': False, 'message': 'User with this email or username already exists'}, 409
             
@@ -117,6 +247,7 @@ class AuthManager:
             user_doc = {
                 'email': email,
                 'username': username,
+                'username_lower': username.lower(),
                 'password': hashed_password,
                 'full_name': full_name,
                 'created_at': None,  # Will be set by MongoDB
@@ -160,6 +291,11 @@ class AuthManager:
             else:
                 return {'success': False, 'message': 'Failed to create user'}, 500
                 
+        except DuplicateKeyError:
+            # Lost a race with a concurrent registration for the same email or username
+            return {'success': False, 'message': 'User with this email or username already exists'}, 409
+        except HasherBusy:
+            return {'success': False, 'message': 'Server is busy, please try again shortly'}, 429
         except Exception as e:
             print(f"Registration error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
@@ -177,21 +313,23 @@ class AuthManager:
             if not identifier or not password:
                 return {'success': False, 'message': 'Email/username and password are required'}, 400
             
-            # Find user by email or username
-            user = self.users_collection.find_one({
-                '$or': [
-                    {'email': identifier},
-                    {'username': identifier}
-                ]
-            })
+            # New usernames cannot contain '@', so the identifier's shape picks the
+            # index; accounts named before that rule still match by username
+            user = None
+            if '@' in identifier:
+                user = self._find_user({'email': identifier}, LOGIN_FIELDS)
+            if user is None:
+                user = self._find_user({'username_lower': identifier}, LOGIN_FIELDS)
             
             if user is None:
                 return {'success': False, 'message': 'Invalid credentials'}, 401
             
             # Verify password
-            if not self.verify_password(password, user['password']):
+            if not self.verify_password(password, user.get('password')):
                 return {'success': False, 'message': 'Invalid credentials'}, 401
             
+            self._rehash_password_if_needed(user, password)
+            
             # Create access token
             access_token = create_access_token(
                 identity=str(user['_id']),
@@ -216,6 +354,8 @@ class AuthManager:
                 }
             }, 200
             
+        except HasherBusy:
+            return {'success': False, 'message': 'Server is busy, please try again shortly'}, 429
         except Exception as e:
             print(f"Login error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
@@ -227,7 +367,7 @@ class AuthManager:
                 return {'success': False, 'message': 'Database connection failed'}, 500
             
             from bson import ObjectId
-            user = self.users_collection.find_one({'_id': ObjectId(user_id)})
+            user = self._find_user({'_id': ObjectId(user_id)}, PROFILE_FIELDS)
             
             if user is None:
                 return {'success': False, 'message': 'User not found'}, 404
@@ -279,87 +419,194 @@ class AuthManager:
             
             from bson import ObjectId
             from datetime import datetime
+            from pymongo import UpdateOne
             
-            # Get existing user kanji collection
-            user = self.users_collection.find_one({'_id': ObjectId(user_id)})
-            if user is None:
+            user_object_id = ObjectId(user_id)
+            
+            if self._find_user({'_id': user_object_id}) is None:
                 return {'success': False, 'message': 'User not found'}, 404
             
-            existing_kanji = user.get('kanji_collection', {})
+            self._migrate_embedded_kanji(user_object_id)
             
-            # Add new kanji with timestamps
+            # Upsert on the unique (user_id, char) index: existing kanji are
+            # left untouched and concurrent saves cannot duplicate entries
+            added_at = datetime.utcnow()
+            operations = []
+            seen = set()
             for kanji_info in kanji_list:
                 kanji_char = kanji_info['char']
-                if kanji_char not in existing_kanji:
-                    existing_kanji[kanji_char] = {
-                        'data': kanji_info.get('data'),
-                        'added_at': datetime.utcnow(),
-                        'char': kanji_char
-                    }
+                if not kanji_char or kanji_char in seen:
+                    continue
+                seen.add(kanji_char)
+                
+                operations.append(UpdateOne(
+                    {'user_id': user_object_id, 'char': kanji_char},
+                    {'$setOnInsert': self._saved_kanji_doc(user_object_id, kanji_char, kanji_info.get('data'), added_at)},
+                    upsert=True
+                ))
             
-            # Calculate new kanji count before update
-            new_count = len([k for k in kanji_list if k['char'] not in user.get('kanji_collection', {})])
+            new_count = 0
+            if operations:
+                result = self.saved_kanji_collection.bulk_write(operations, ordered=False)
+                new_count = result.upserted_count
             
-            # Update user's kanji collection
-            result = self.users_collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$set': {'kanji_collection': existing_kanji}}
-            )
+            total_kanji = self.saved_kanji_collection.count_documents({'user_id': user_object_id})
             
             # Always return success, whether new kanji were added or all were duplicates
             if new_count > 0:
                 return {
                     'success': True, 
                     'message': f'Successfully saved {new_count} new kanji to collection',
-                    'total_kanji': len(existing_kanji)
+                    'total_kanji': total_kanji
                 }, 200
             else:
                 return {
                     'success': True, 
                     'message': 'Kanji successfully added to collection',
-                    'total_kanji': len(existing_kanji)
+                    'total_kanji': total_kanji
                 }, 200
                 
         except Exception as e:
             print(f"Save kanji error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
 
-    def get_user_kanji_collection(self, user_id):
-        """Get user's saved kanji collection"""
+    def _saved_kanji_doc(self, user_object_id, kanji_char, data, added_at):
+        """Build a saved_kanji document, copying sort keys out of the kanji metadata"""
+        info = data.get('data') if isinstance(data, dict) and data.get('success') else None
+        info = info if isinstance(info, dict) else {}
+        
+        return {
+            'user_id': user_object_id,
+            'char': kanji_char,
+            'data': data,
+            'added_at': added_at,
+            # Missing values are stored as 0 so cursor range queries stay
+            # numeric; the has_* flags keep them after the known ones
+            'jlpt': info.get('jlpt') or 0,
+            'has_jlpt': 1 if info.get('jlpt') else 0,
+            'stroke_count': info.get('stroke_count') or 0,
+            'has_stroke_count': 1 if info.get('stroke_count') else 0
+        }
+
+    def _migrate_embedded_kanji(self, user_object_id):
+        """Move a user's legacy embedded kanji_collection map into saved_kanji"""
+        from pymongo.errors import BulkWriteError
+        
+        user = self._find_user(
+            {'_id': user_object_id, 'kanji_collection': {'$exists': True}},
+            ('kanji_collection',)
+        )
+        if user is None:
+            return
+        
+        docs = [
+            self._saved_kanji_doc(user_object_id, kanji_char, kanji_info.get('data'), kanji_info.get('added_at'))
+            for kanji_char, kanji_info in (user.get('kanji_collection') or {}).items()
+        ]
+        if docs:
+            try:
+                self.saved_kanji_collection.insert_many(docs, ordered=False)
+            except BulkWriteError:
+                # Some kanji were already migrated by a concurrent request
+                pass
+        
+        self.users_collection.update_one({'_id': user_object_id}, {'$unset': {'kanji_collection': ''}})
+
+    def get_user_kanji_collection(self, user_id, sort='added', order='desc', limit=None, cursor=None):
+        """
+        Get user's saved kanji collection
+        
+        Args:
+            user_id: JWT identity of the user
+            sort: 'added', 'jlpt' or 'strokes'
+            order: 'asc' or 'desc'
+            limit: Page size; None returns the whole collection
+            cursor: next_cursor from the previous page
+        """
         try:
             if self.users_collection is None:
                 return {'success': False, 'message': 'Database connection failed'}, 500
             
-            from bson import ObjectId
+            from bson import ObjectId, json_util
+            import base64
             
-            user = self.users_collection.find_one({'_id': ObjectId(user_id)})
-            if user is None:
+            if sort not in KANJI_SORT_FIELDS:
+                return {'success': False, 'message': f"Invalid sort, expected one of: {', '.join(KANJI_SORT_FIELDS)}"}, 400
+            if order not in ('asc', 'desc'):
+                return {'success': False, 'message': "Invalid order, expected 'asc' or 'desc'"}, 400
+            if limit is not None and not 1 <= limit <= MAX_KANJI_PAGE_SIZE:
+                return {'success': False, 'message': f'Limit must be between 1 and {MAX_KANJI_PAGE_SIZE}'}, 400
+            
+            user_object_id = ObjectId(user_id)
+            
+            if self._find_user({'_id': user_object_id}) is None:
                 return {'success': False, 'message': 'User not found'}, 404
             
-            kanji_collection = user.get('kanji_collection', {})
+            self._migrate_embedded_kanji(user_object_id)
+            
+            sort_field = KANJI_SORT_FIELDS[sort]
+            direction = -1 if order == 'desc' else 1
+            sort_keys = [(sort_field, direction), ('_id', direction)]
+            if sort_field in KANJI_SORT_PRESENCE:
+                # Kanji without the value go last whichever way the list is sorted
+                sort_keys.insert(0, (KANJI_SORT_PRESENCE[sort_field], -1))
+            
+            query = {'user_id': user_object_id}
+            if cursor:
+                # Keyset pagination: resume strictly after the last sort key values returned
+                try:
+                    last_values = json_util.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+                except Exception:
+                    return {'success': False, 'message': 'Invalid cursor'}, 400
+                if not isinstance(last_values, list) or len(last_values) != len(sort_keys):
+                    return {'success': False, 'message': 'Invalid cursor'}, 400
+                query['$or'] = self._keyset_after(sort_keys, last_values)
+            
+            results = self.saved_kanji_collection.find(
+                query,
+                {'char': 1, 'data': 1, 'added_at': 1, **{field: 1 for field, _ in sort_keys}}
+            ).sort(sort_keys)
+            if limit is not None:
+                # Fetch one extra document to know whether another page exists
+                results = results.limit(limit + 1)
+            docs = list(results)
+            
+            next_cursor = None
+            if limit is not None and len(docs) > limit:
+                docs = docs[:limit]
+                last = docs[-1]
+                next_cursor = base64.urlsafe_b64encode(
+                    json_util.dumps([last.get(field, 0) for field, _ in sort_keys]).encode('ascii')
+                ).decode('ascii')
             
             # Convert to list format for frontend
-            kanji_list = []
-            for kanji_char, kanji_info in kanji_collection.items():
-                kanji_list.append({
-                    'char': kanji_char,
-                    'data': kanji_info.get('data'),
-                    'added_at': kanji_info.get('added_at')
-                })
-            
-            # Sort by added_at (newest first)
-            kanji_list.sort(key=lambda x: x.get('added_at', ''), reverse=True)
+            kanji_list = [{
+                'char': doc['char'],
+                'data': doc.get('data'),
+                'added_at': doc.get('added_at')
+            } for doc in docs]
             
             return {
                 'success': True,
                 'kanji': kanji_list,
-                'total_count': len(kanji_list)
+                'total_count': self.saved_kanji_collection.count_documents({'user_id': user_object_id}),
+                'next_cursor': next_cursor
             }, 200
                 
         except Exception as e:
             print(f"Get kanji collection error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
 
+    @staticmethod
+    def _keyset_after(sort_keys, last_values):
+        """$or clauses matching documents that sort strictly after `last_values` under `sort_keys`"""
+        clauses = []
+        for position, (field, direction) in enumerate(sort_keys):
+            clause = {earlier_field: value for (earlier_field, _), value in zip(sort_keys[:position], last_values)}
+            clause[field] = {'$lt' if direction == -1 else '$gt': last_values[position]}
+            clauses.append(clause)
+        return clauses
+    
     def remove_kanji_from_collection(self, user_id, kanji_char):
         """Remove a kanji from user's collection"""
         try:
@@ -368,13 +615,13 @@ class AuthManager:
             
             from bson import ObjectId
             
+            user_object_id = ObjectId(user_id)
+            self._migrate_embedded_kanji(user_object_id)
+            
             # Remove kanji from user's collection
-            result = self.users_collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$unset': {f'kanji_collection.{kanji_char}': ""}}
-            )
+            result = self.saved_kanji_collection.delete_one({'user_id': user_object_id, 'char': kanji_char})
             
-            if result.modified_count > 0:
+            if result.deleted_count > 0:
                 return {'success': True, 'message': 'Kanji removed from collection'}, 200
             else:
                 return {'success': False, 'message': 'Kanji not found in collection'}, 404
@@ -397,20 +644,16 @@ class AuthManager:
                 return {'success': False, 'message': 'Google profile did not include an email'}, 400
 
             # Try to find existing user by email
-            user = self.users_collection.find_one({'email': email})
+            user = self._find_user({'email': email}, PROFILE_FIELDS)
 
             if user is None:
                 # Create a username suggestion from email
-                base_username = email.split('@')[0]
-                username = base_username
-                counter = 1
-                while self.users_collection.find_one({'username': username}):
-                    username = f"{base_username}{counter}"
-                    counter += 1
+                username = self._available_username(email.split('@')[0])
 
                 user_doc = {
                     'email': email,
                     'username': username,
+                    'username_lower': username.lower(),
                     'password': None,
                     'full_name': full_name,
                     'google_id': google_id,
@@ -429,7 +672,7 @@ class AuthManager:
 
                 result = self.users_collection.insert_one(user_doc)
                 if result.inserted_id:
-                    user = self.users_collection.find_one({'_id': result.inserted_id})
+                    user = self._find_user({'_id': result.inserted_id}, PROFILE_FIELDS)
                 else:
                     return {'success': False, 'message': 'Failed to create user from Google profile'}, 500
 
@@ -460,6 +703,30 @@ class AuthManager:
             print(f"Google OAuth handling error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
 
+    def _available_username(self, base_username):
+        """
+        Return base_username, or base_username followed by the lowest free number
+        
+        One range query on the username_lower index fetches every taken name
+        sharing the prefix instead of probing candidates one at a time.
+        """
+        base_lower = base_username.lower()
+        prefix_end = base_lower[:-1] + chr(ord(base_lower[-1]) + 1) if base_lower else '\uffff'
+        taken = {
+            user['username_lower']
+            for user in self.users_collection.find(
+                {'username_lower': {'$gte': base_lower, '$lt': prefix_end}},
+                {'_id': 0, 'username_lower': 1}
+            )
+        }
+        
+        username = base_username
+        counter = 1
+        while username.lower() in taken:
+            username = f"{base_username}{counter}"
+            counter += 1
+        return username
+    
     def update_user_profile(self, user_id, full_name, username):
         """Update user profile information"""
         try:
@@ -468,9 +735,13 @@ class AuthManager:
             
             from bson import ObjectId
             
+            is_valid, message = self.validate_username(username)
+            if not is_valid:
+                return {'success': False, 'message': message}, 400
+            
             # Check if username is already taken by another user
-            existing_user = self.users_collection.find_one({
-                'username': username,
+            existing_user = self._find_user({
+                'username_lower': username.lower(),
                 '_id': {'$ne': ObjectId(user_id)}
             })
             
@@ -482,7 +753,8 @@ class AuthManager:
                 {'_id': ObjectId(user_id)},
                 {'$set': {
                     'full_name': full_name,
-                    'username': username
+                    'username': username,
+                    'username_lower': username.lower()
                 }}
             )
             
@@ -491,6 +763,9 @@ class AuthManager:
             else:
                 return {'success': False, 'message': 'No changes made'}, 400
                 
+        except DuplicateKeyError:
+            # Another user took the name between the check above and the update
+            return {'success': False, 'message': 'Username already taken'}, 400
         except Exception as e:
             print(f"Update profile error: {e}")
             return {'success': False, 'message': 'Internal server error'}, 500
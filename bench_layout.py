@@ -0,0 +1,170 @@
+"""
+Benchmark OCR line ordering: layout.analyze_layout against the previous sort
+
+Usage:
+    python bench_layout.py [--lines 500 2000 10000] [--repeat 20] [--seed 0]
+
+Builds synthetic Read results with a known reading order and, for each page
+kind and size, reports the time per page and how much of the order each
+implementation gets right (share of sampled line pairs put in true order):
+
+    manga       vertical speech bubbles in tiers, read top tier first, right to left
+    columns     horizontal text set in two columns
+    mixed       a manga page with horizontal captions of one to three rows between the bubbles
+
+It then checks small hand-made layouts (LAYOUT_CASES) that must come out in
+exactly the given order; swapping two caption rows barely moves the sampled
+pair score, but reads wrong.
+"""
+import time
+import random
+import argparse
+from typing import List, Dict, Any, Callable
+
+import layout
+
+
+def legacy_order(lines: List[Dict[str, Any]]) -> List[int]:
+    """The ordering _parse_ocr_result used before layout.py: page-average orientation, one sort key"""
+    avg_height = sum(line['boundingBox'][7] - line['boundingBox'][1] for line in lines) / len(lines)
+    avg_width = sum(line['boundingBox'][2] - line['boundingBox'][0] for line in lines) / len(lines)
+    indices = list(range(len(lines)))
+    if avg_height > avg_width:
+        indices.sort(key=lambda index: lines[index]['boundingBox'][0], reverse=True)
+    else:
+        indices.sort(key=lambda index: lines[index]['boundingBox'][1])
+    return indices
+
+
+def numpy_order(lines: List[Dict[str, Any]]) -> List[int]:
+    return layout._analyze_numpy([line['boundingBox'] for line in lines])[0]
+
+
+def python_order(lines: List[Dict[str, Any]]) -> List[int]:
+    return layout._analyze_python([line['boundingBox'] for line in lines])[0]
+
+
+def make_line(x0: int, y0: int, x1: int, y1: int) -> Dict[str, Any]:
+    return {'text': '', 'boundingBox': [x0, y0, x1, y0, x1, y1, x0, y1]}
+
+
+def manga_page(count: int, rng: random.Random, captions: bool = False) -> List[Dict[str, Any]]:
+    """Lines in true reading order: tiers of bubbles, each bubble a few vertical columns"""
+    lines = []
+    tier_top = 0
+    while len(lines) < count:
+        tier_height = rng.randint(500, 800)
+        x_right = 4000
+        while x_right > 400 and len(lines) < count:
+            bubble_top = tier_top + rng.randint(0, tier_height // 3)
+            for _ in range(rng.randint(2, 5)):
+                length = rng.randint(120, tier_height // 2)
+                top = bubble_top + rng.randint(0, 20)
+                lines.append(make_line(x_right - 32, top, x_right, top + length))
+                x_right -= 38
+            if captions and rng.random() < 0.3:
+                # Left-aligned rows of uneven length, so a later row can reach further right,
+                # level with the bubble so they sit inside its tier
+                top = bubble_top + 10
+                for row in range(rng.randint(1, 3)):
+                    lines.append(make_line(x_right - 170, top + row * 40, x_right - rng.randint(10, 90), top + row * 40 + 28))
+            x_right -= rng.randint(60, 200)
+        tier_top += tier_height + 60
+    return lines[:count]
+
+
+def columns_page(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Lines in true reading order: the left column top to bottom, then the right one"""
+    per_column = (count + 1) // 2
+    lines = []
+    for left in (60, 1060):
+        for row in range(per_column):
+            top = 80 + row * 42 + rng.randint(-2, 2)
+            lines.append(make_line(left, top, left + rng.randint(700, 900), top + 30))
+    return lines[:count]
+
+
+# name -> lines in true reading order
+LAYOUT_CASES = {
+    # Three manga columns, then a two-row caption whose second row is longer
+    'caption rows': [
+        make_line(900, 50, 930, 400), make_line(800, 60, 830, 350), make_line(700, 50, 730, 300),
+        make_line(300, 100, 500, 130), make_line(300, 140, 560, 170)
+    ],
+    # Horizontal text with a two-column vertical heading to its right, read right to left
+    'vertical heading': [
+        make_line(100, 100, 900, 130), make_line(100, 140, 900, 170),
+        make_line(950, 90, 980, 400), make_line(920, 90, 945, 300)
+    ]
+}
+
+
+def order_accuracy(order: List[int], samples: int = 20000, seed: int = 0) -> float:
+    """Share of randomly sampled line pairs that the order puts in their true sequence"""
+    if len(order) < 2:
+        return 1.0
+    position = {index: rank for rank, index in enumerate(order)}
+    rng = random.Random(seed)
+    correct = 0
+    for _ in range(samples):
+        first, second = sorted(rng.sample(range(len(order)), 2))
+        correct += position[first] < position[second]
+    return correct / samples
+
+
+def time_per_page(func: Callable, lines: List[Dict[str, Any]], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(lines)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    implementations = [('legacy', legacy_order), ('python', python_order)]
+    if layout.HAS_NUMPY:
+        implementations.append(('numpy', numpy_order))
+
+    pages = {
+        'manga': lambda count, rng: manga_page(count, rng),
+        'columns': columns_page,
+        'mixed': lambda count, rng: manga_page(count, rng, captions=True)
+    }
+
+    print(f"{'page':<8} {'lines':>6}  " + '  '.join(f"{name + ' ms':>10} {'order':>6}" for name, _ in implementations))
+    for page_name, build in pages.items():
+        for count in args.lines:
+            lines = build(count, random.Random(args.seed))
+            # Read results arrive in no particular order
+            shuffled = list(range(len(lines)))
+            random.Random(args.seed).shuffle(shuffled)
+            page = [lines[index] for index in shuffled]
+
+            cells = []
+            for _, func in implementations:
+                order = [shuffled[index] for index in func(page)]
+                elapsed = time_per_page(func, page, args.repeat)
+                cells.append(f"{elapsed * 1000:>10.2f} {order_accuracy(order):>6.1%}")
+            print(f"{page_name:<8} {len(lines):>6}  " + '  '.join(cells))
+
+    print()
+    for case_name, lines in LAYOUT_CASES.items():
+        shuffled = list(range(len(lines)))
+        random.Random(args.seed).shuffle(shuffled)
+        page = [lines[index] for index in shuffled]
+        results = []
+        for name, func in implementations:
+            order = [shuffled[index] for index in func(page)]
+            results.append(f"{name} {'ok' if order == list(range(len(lines))) else order}")
+        print(f"{case_name:<18} " + '  '.join(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Build the local kanji index used by /api/kanji/info from KANJIDIC2
+
+Usage:
+    python build_kanji_index.py path/to/kanjidic2.xml[.gz] [output_path]
+    python build_kanji_index.py --download [output_path]
+
+KANJIDIC2 is published by the Electronic Dictionary Research and Development
+Group under CC BY-SA 4.0: https://www.edrdg.org/wiki/index.php/KANJIDIC_Project
+"""
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import urllib.request
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Iterator
+
+from kanji_dict import DEFAULT_INDEX_PATH, write_index
+
+KANJIDIC2_URL = 'https://www.edrdg.org/kanjidic/kanjidic2.xml.gz'
+
+def _int_or_none(element) -> Any:
+    if element is None or not element.text:
+        return None
+    return int(element.text)
+
+def parse_kanjidic2(source_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream kanji records out of a KANJIDIC2 file
+
+    Records use the same field names as kanjiapi.dev so the frontend can
+    consume either source.
+    """
+    opener = gzip.open if source_path.endswith('.gz') else open
+
+    with opener(source_path, 'rb') as source:
+        for _, element in ET.iterparse(source, events=('end',)):
+            if element.tag != 'character':
+                continue
+
+            literal = element.findtext('literal')
+            misc = element.find('misc')
+
+            on_readings, kun_readings, meanings = [], [], []
+            for reading in element.iterfind('reading_meaning/rmgroup/reading'):
+                if reading.get('r_type') == 'ja_on':
+                    on_readings.append(reading.text)
+                elif reading.get('r_type') == 'ja_kun':
+                    kun_readings.append(reading.text)
+
+            # English meanings carry no m_lang attribute
+            for meaning in element.iterfind('reading_meaning/rmgroup/meaning'):
+                if meaning.get('m_lang') is None:
+                    meanings.append(meaning.text)
+
+            yield {
+                'kanji': literal,
+                'grade': _int_or_none(misc.find('grade')),
+                'stroke_count': _int_or_none(misc.find('stroke_count')),
+                'meanings': meanings,
+                'kun_readings': kun_readings,
+                'on_readings': on_readings,
+                'name_readings': [nanori.text for nanori in element.iterfind('reading_meaning/nanori')],
+                'jlpt': _int_or_none(misc.find('jlpt')),
+                'unicode': format(ord(literal), 'x') if len(literal) == 1 else None,
+                'freq_mainichi_shinbun': _int_or_none(misc.find('freq'))
+            }
+
+            element.clear()
+
+def build_index(source_path: str, output_path: str) -> int:
+    """Write the binary index for every kanji in `source_path` and return the entry count"""
+    return write_index(parse_kanjidic2(source_path), output_path)
+
+def download_kanjidic2(target_dir: str) -> str:
+    """Download the current KANJIDIC2 release and return the local path"""
+    target_path = os.path.join(target_dir, 'kanjidic2.xml.gz')
+    with urllib.request.urlopen(KANJIDIC2_URL) as response, open(target_path, 'wb') as target:
+        shutil.copyfileobj(response, target)
+    return target_path
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    output_path = args[1] if len(args) > 1 else DEFAULT_INDEX_PATH
+
+    if args[0] == '--download':
+        with tempfile.TemporaryDirectory() as temp_dir:
+            print(f"Downloading {KANJIDIC2_URL}...")
+            count = build_index(download_kanjidic2(temp_dir), output_path)
+    else:
+        count = build_index(args[0], output_path)
+
+    print(f"Wrote {count} kanji to {output_path}")
+
+if __name__ == "__main__":
+    main()
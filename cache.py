@@ -0,0 +1,207 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+def make_cache_key(*parts) -> str:
+    """
+    Build a stable hex digest from a sequence of str/bytes parts
+
+    Args:
+        *parts: Values that together identify a cache entry
+
+    Returns:
+        str: SHA-256 hex digest of the length-prefixed parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(str(len(part)).encode('ascii') + b':')
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    def __init__(self, directory: str, max_bytes: int, suffix: str = '.bin'):
+        """
+        Disk-backed byte cache with size-based LRU eviction
+
+        Entries live as one file per key in `directory`. Recency is tracked in
+        memory and mirrored to file mtimes, so a restarted process resumes with
+        the same eviction order.
+
+        Args:
+            directory (str): Folder that holds the cache entries
+            max_bytes (int): Total size the entries may occupy before eviction
+            suffix (str): File extension used for entries
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU index from files already on disk"""
+        found = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits. Caller holds the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for `key`, or None on a miss"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'rb') as cache_file:
+                    value = cache_file.read()
+            except OSError:
+                # Missing (or evicted by another worker sharing the directory)
+                if key in self._entries:
+                    self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = len(value)
+                self._total_bytes += len(value)
+
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        """Store `value` under `key`, evicting old entries if needed"""
+        if len(value) > self.max_bytes:
+            return
+
+        # Write to a temp file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(value)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Cache write failed: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = len(value)
+            self._total_bytes += len(value)
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+
+class LRUCache:
+    def __init__(self, max_entries: int):
+        """
+        Thread-safe in-memory LRU mapping with hit/miss counters
+
+        Args:
+            max_entries (int): Number of entries kept before the oldest is evicted
+        """
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for `key`, or `default` on a miss"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store `value` under `key`, evicting the least recently used entry if full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import './App.css';
-import { extractKanji, fetchKanjiInfo } from './utils/kanjiUtils';
+import { extractKanji, fetchKanjiInfoBulk } from './utils/kanjiUtils';
 import { handlePlayAudio } from './utils/audioUtils';
 import Navbar from './components/Navbar';
 import SidebarKanji from './components/SidebarKanji';
@@ -182,7 +182,17 @@ function AppContent() {
 
   // Extract kanji when result changes
   useEffect(() => {
-    if (result && result.original_text) {
+    if (result && Array.isArray(result.kanji)) {
+      // The backend already extracted and enriched the kanji in the same pass
+      const knownKanji = {};
+      result.kanji.forEach(({ char, data }) => {
+        if (data) {
+          knownKanji[char] = { success: true, data: data };
+        }
+      });
+      setKanjiData(prev => ({ ...prev, ...knownKanji }));
+      setKanjiList(result.kanji.map(({ char }) => char));
+    } else if (result && result.original_text) {
       const extractedKanji = extractKanji(result.original_text);
       setKanjiList(extractedKanji);
     }
@@ -190,33 +200,37 @@ function AppContent() {
 
   // Separate effect to load kanji info when kanjiList changes
   useEffect(() => {
-    kanjiList.forEach(kanji => {
-      if (!kanjiData[kanji] && !kanjiLoading[kanji]) {
-        loadKanjiInfo(kanji);
-      }
-    });
+    const kanjiToLoad = kanjiList.filter(kanji => !kanjiData[kanji] && !kanjiLoading[kanji]);
+    if (kanjiToLoad.length > 0) {
+      loadKanjiInfo(kanjiToLoad);
+    }
   }, [kanjiList]); // eslint-disable-line react-hooks/exhaustive-deps
 
   // Sorting is handled inside SidebarKanji component now.
 
-  const loadKanjiInfo = async (kanji) => {
-    if (kanjiData[kanji] || kanjiLoading[kanji]) return;
-    
-    setKanjiLoading(prev => ({ ...prev, [kanji]: true }));
+  const setLoadingFor = (kanjiToLoad, isLoading) => {
+    setKanjiLoading(prev => ({
+      ...prev,
+      ...Object.fromEntries(kanjiToLoad.map(kanji => [kanji, isLoading]))
+    }));
+  };
+
+  const loadKanjiInfo = async (kanjiToLoad) => {
+    setLoadingFor(kanjiToLoad, true);
     
     try {
-      const result = await fetchKanjiInfo(kanji);
+      const results = await fetchKanjiInfoBulk(API_BASE_URL, kanjiToLoad);
       setKanjiData(prev => ({ 
         ...prev, 
-        [kanji]: result 
+        ...results 
       }));
     } catch (error) {
       setKanjiData(prev => ({ 
         ...prev, 
-        [kanji]: { success: false, error: error.message } 
+        ...Object.fromEntries(kanjiToLoad.map(kanji => [kanji, { success: false, error: error.message }]))
       }));
     } finally {
-      setKanjiLoading(prev => ({ ...prev, [kanji]: false }));
+      setLoadingFor(kanjiToLoad, false);
     }
   };
 
@@ -282,7 +296,8 @@ function AppContent() {
       if (inputMode === 'text') {
         // Process text directly without OCR
         response = await axios.post(`${API_BASE_URL}/api/process-text`, {
-          text: pastedText
+          text: pastedText,
+          include_kanji: true
         }, {
           headers: {
             'Content-Type': 'application/json',
@@ -292,6 +307,7 @@ function AppContent() {
         // Process image with OCR
         const formData = new FormData();
         formData.append('file', selectedFile);
+        formData.append('include_kanji', 'true');
         
         response = await axios.post(`${API_BASE_URL}/api/upload`, formData, {
           headers: {
@@ -2,19 +2,38 @@ import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import '../styles/Dashboard.css';
 
+// Dashboard sort options -> server-side sort parameters for /api/kanji/saved
+const SORT_PARAMS = {
+  'default': { sort: 'added', order: 'desc' },
+  'jlpt-hard': { sort: 'jlpt', order: 'desc' },
+  'jlpt-easy': { sort: 'jlpt', order: 'asc' },
+  'strokes-less': { sort: 'strokes', order: 'asc' },
+  'strokes-more': { sort: 'strokes', order: 'desc' },
+};
+const PAGE_SIZE = 60;
+
 const Dashboard = ({ onClose }) => {
   const { token } = useAuth();
   const [savedKanji, setSavedKanji] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [sortBy, setSortBy] = useState('default');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalCount, setTotalCount] = useState(0);
 
   const API_BASE_URL = process.env.NODE_ENV === 'production' 
     ? process.env.REACT_APP_API_URL || 'https://your-render-backend-url.onrender.com' 
     : 'http://localhost:5000';
 
-  const fetchSavedKanji = useCallback(async () => {
+  const fetchSavedKanji = useCallback(async (cursor = null) => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/kanji/saved`, {
+      const { sort, order } = SORT_PARAMS[sortBy] || SORT_PARAMS.default;
+      const params = new URLSearchParams({ sort, order, limit: PAGE_SIZE });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+
+      const response = await fetch(`${API_BASE_URL}/api/kanji/saved?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
@@ -23,19 +42,29 @@ const Dashboard = ({ onClose }) => {
 
       if (response.ok) {
         const data = await response.json();
-        setSavedKanji(data.kanji || []);
+        const page = data.kanji || [];
+        setSavedKanji(prev => (cursor ? [...prev, ...page] : page));
+        setNextCursor(data.next_cursor || null);
+        setTotalCount(data.total_count || 0);
       }
     } catch (error) {
       console.error('Error fetching saved kanji:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
-  }, [API_BASE_URL, token]);
+  }, [API_BASE_URL, token, sortBy]);
 
   useEffect(() => {
     fetchSavedKanji();
   }, [fetchSavedKanji]);
 
+  const loadMoreKanji = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    fetchSavedKanji(nextCursor);
+  };
+
   const removeKanji = async (kanjiChar) => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/kanji/remove`, {
@@ -49,47 +78,13 @@ const Dashboard = ({ onClose }) => {
 
       if (response.ok) {
         setSavedKanji(prev => prev.filter(k => k.char !== kanjiChar));
+        setTotalCount(prev => Math.max(prev - 1, 0));
       }
     } catch (error) {
       console.error('Error removing kanji:', error);
     }
   };
 
-  const sortKanji = (kanji, sortType) => {
-    const sorted = [...kanji];
-    
-    switch (sortType) {
-      case 'jlpt-easy':
-        return sorted.sort((a, b) => {
-          const aJlpt = a.data?.success ? (a.data.data.jlpt || 99) : 99;
-          const bJlpt = b.data?.success ? (b.data.data.jlpt || 99) : 99;
-          return aJlpt - bJlpt; // N5 (5) to N1 (1), so ascending
-        });
-      case 'jlpt-hard':
-        return sorted.sort((a, b) => {
-          const aJlpt = a.data?.success ? (a.data.data.jlpt || 0) : 0;
-          const bJlpt = b.data?.success ? (b.data.data.jlpt || 0) : 0;
-          return bJlpt - aJlpt; // N1 (1) to N5 (5), so descending
-        });
-      case 'strokes-less':
-        return sorted.sort((a, b) => {
-          const aStrokes = a.data?.success ? (a.data.data.stroke_count || 999) : 999;
-          const bStrokes = b.data?.success ? (b.data.data.stroke_count || 999) : 999;
-          return aStrokes - bStrokes;
-        });
-      case 'strokes-more':
-        return sorted.sort((a, b) => {
-          const aStrokes = a.data?.success ? (a.data.data.stroke_count || 0) : 0;
-          const bStrokes = b.data?.success ? (b.data.data.stroke_count || 0) : 0;
-          return bStrokes - aStrokes;
-        });
-      default:
-        return sorted;
-    }
-  };
-
-  const sortedKanji = sortKanji(savedKanji, sortBy);
-
   return (
     <div className="dashboard-page">
       <div className="dashboard-header">
@@ -124,7 +119,7 @@ const Dashboard = ({ onClose }) => {
           <div className="kanji-collection">
             <div className="collection-stats">
               <div className="stat-item">
-                <span className="stat-number">{savedKanji.length}</span>
+                <span className="stat-number">{totalCount}</span>
                 <span className="stat-label">Kanji Saved</span>
               </div>
             </div>
@@ -146,7 +141,7 @@ const Dashboard = ({ onClose }) => {
             </div>
             
             <div className="kanji-grid">
-              {sortedKanji.map((kanjiInfo) => (
+              {savedKanji.map((kanjiInfo) => (
                 <div key={kanjiInfo.char} className="saved-kanji-card">
                   <div className="kanji-card-header">
                     <div className="kanji-character">{kanjiInfo.char}</div>
@@ -220,6 +215,16 @@ const Dashboard = ({ onClose }) => {
                 </div>
               ))}
             </div>
+
+            {nextCursor && (
+              <button 
+                className="load-more-btn"
+                onClick={loadMoreKanji}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         )}
       </div>
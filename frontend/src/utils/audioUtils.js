@@ -4,6 +4,9 @@ const API_URL = process.env.NODE_ENV === 'production'
   ? 'https://yomi-backend.onrender.com/api/tts'
   : 'http://localhost:5000/api/tts';
 
+// Long sentences go by POST: production servers reject request lines over ~4 KB
+const TTS_GET_MAX_URL = 2000;
+
 export const handlePlayAudio = async (text, lineKey, playingAudio, setPlayingAudio, audioLoadingStates, setAudioLoadingStates) => {
   try {
     if (playingAudio) {
@@ -13,11 +16,12 @@ export const handlePlayAudio = async (text, lineKey, playingAudio, setPlayingAud
 
     setAudioLoadingStates(prev => ({ ...prev, [lineKey]: true }));
 
-    const response = await axios.post(API_URL, {
-      text: text
-    }, {
-      responseType: 'blob'
-    });
+    // GET when the URL stays short so the browser can reuse cached audio
+    // (the API sends ETag/Cache-Control); the server caches POSTs as well
+    const url = `${API_URL}?text=${encodeURIComponent(text)}`;
+    const response = url.length <= TTS_GET_MAX_URL
+      ? await axios.get(url, { responseType: 'blob' })
+      : await axios.post(API_URL, { text: text }, { responseType: 'blob' });
 
     const audioBlob = new Blob([response.data], { type: 'audio/mpeg' });
     const audioUrl = URL.createObjectURL(audioBlob);
@@ -41,4 +41,57 @@ export const fetchKanjiInfo = async (kanji) => {
       error: `Network error: ${error.message}`
     };
   }
-};
\ No newline at end of file
+};
+// Look up many kanji with as few requests to the backend's local index as it
+// accepts (KANJI_LOOKUP_CHUNK per request), falling back to kanjiapi.dev only
+// for kanji the index does not know.
+const KANJI_LOOKUP_CHUNK = 500; // MAX_KANJI_PER_LOOKUP in app.py
+
+const fetchKanjiChunk = async (apiBaseUrl, chunk) => {
+  const results = {};
+  let missing = chunk;
+
+  try {
+    const response = await fetch(`${apiBaseUrl}/api/kanji/info?chars=${encodeURIComponent(chunk.join(''))}`);
+
+    if (response.status === 200) {
+      const body = await response.json();
+      missing = [];
+      for (const kanji of chunk) {
+        const info = body.kanji?.[kanji];
+        if (info) {
+          results[kanji] = { success: true, data: info };
+        } else {
+          missing.push(kanji);
+        }
+      }
+    }
+  } catch (error) {
+    console.error('Bulk kanji lookup failed:', error);
+  }
+
+  return { results, missing };
+};
+
+export const fetchKanjiInfoBulk = async (apiBaseUrl, kanjiList) => {
+  const unique = [...new Set(kanjiList)];
+  const chunks = [];
+  for (let start = 0; start < unique.length; start += KANJI_LOOKUP_CHUNK) {
+    chunks.push(unique.slice(start, start + KANJI_LOOKUP_CHUNK));
+  }
+
+  const results = {};
+  const missing = [];
+  const chunkResults = await Promise.all(chunks.map(chunk => fetchKanjiChunk(apiBaseUrl, chunk)));
+  for (const chunkResult of chunkResults) {
+    Object.assign(results, chunkResult.results);
+    missing.push(...chunkResult.missing);
+  }
+
+  const fallbacks = await Promise.all(missing.map(kanji => fetchKanjiInfo(kanji)));
+  missing.forEach((kanji, index) => {
+    results[kanji] = fallbacks[index];
+  });
+
+  return results;
+};
@@ -1,11 +1,13 @@
 import os
 import re
 import json
-from typing import List, Dict, Any, Tuple
+import threading
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 from dotenv import load_dotenv
 import requests
 
 from ocr_az import AzureOCR
+from cache import LRUCache
 
 load_dotenv()
 
@@ -26,10 +28,21 @@ class FuriganaGenerator:
             import MeCab
             self.mecab = MeCab.Tagger("-Owakati")
             self.has_mecab = True
+            # A Tagger keeps per-parse state, so threads (background jobs,
+            # translation workers) take turns using it
+            self._mecab_lock = threading.Lock()
         except ImportError:
             print("Warning: MeCab not available. Using basic tokenization.")
             self.has_mecab = False
         
+        # Take readings from MeCab's dictionary features (ipadic puts the
+        # katakana reading in field 7) and only ask kakasi for unknown words
+        self.use_mecab_readings = os.getenv('FURIGANA_MECAB_READINGS', 'true').lower() != 'false'
+        self.mecab_reading_field = int(os.getenv('MECAB_READING_FIELD', 7))
+        
+        # Token -> reading memo shared by every request this process serves
+        self.reading_cache = LRUCache(int(os.getenv('FURIGANA_READING_CACHE_SIZE', 50000)))
+        
         self.kanji_pattern = re.compile(r'[\u4e00-\u9faf]+')
         self.hiragana_pattern = re.compile(r'[\u3040-\u309f]+')
         self.katakana_pattern = re.compile(r'[\u30a0-\u30ff]+')
@@ -46,6 +59,18 @@ class FuriganaGenerator:
         """
         ocr_result = self.ocr.extract_text_from_image(image_path)
         
+        return self.add_furigana_to_ocr_result(ocr_result)
+
+    def add_furigana_to_ocr_result(self, ocr_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add furigana annotations to an already parsed OCR result
+        
+        Args:
+            ocr_result: Result from AzureOCR.extract_text_from_image
+            
+        Returns:
+            Dict containing original OCR results plus furigana annotations
+        """
         furigana_result = {
             'original_ocr': ocr_result,
             'furigana_text': '',
@@ -61,9 +86,11 @@ class FuriganaGenerator:
                 'lines': []
             }
             
-            for line_info in page['lines']:
+            page_lines = [line_info['text'] for line_info in page['lines']]
+            furigana_lines = self.add_furigana_to_lines(page_lines)
+            
+            for line_info, furigana_line in zip(page['lines'], furigana_lines):
                 original_text = line_info['text']
-                furigana_line = self._add_furigana_to_text(original_text)
                 
                 furigana_line_info = {
                     'original_text': original_text,
@@ -97,7 +124,7 @@ class FuriganaGenerator:
         Returns:
             Dict with furigana-annotated text and parts
         """
-        if not self.has_kakasi:
+        if not self._can_annotate():
             return {
                 'text': text,
                 'parts': [{'text': text, 'reading': '', 'type': 'unknown'}]
@@ -105,6 +132,50 @@ class FuriganaGenerator:
         
         parts = self._tokenize_and_analyze(text)
         
+        return self._build_furigana_line(parts)
+
+    def add_furigana_to_lines(self, lines: List[str]) -> List[Dict[str, Any]]:
+        """
+        Add furigana to many lines at once, e.g. every OCR line of a page
+        
+        Args:
+            lines (List[str]): Lines of Japanese text
+            
+        Returns:
+            List with one furigana-annotated text/parts dict per input line
+        """
+        if not self._can_annotate():
+            return [self._add_furigana_to_text(line) for line in lines]
+        
+        return [self._build_furigana_line(parts) for parts in self._tokenize_lines(lines)]
+
+    def extract_kanji(self, lines_parts: Iterable[List[Dict[str, str]]]) -> List[str]:
+        """
+        Collect the unique kanji in analyzed parts, in order of first appearance
+        
+        Args:
+            lines_parts: The 'parts' list of each annotated line
+            
+        Returns:
+            List of individual kanji characters
+        """
+        seen = {}
+        for parts in lines_parts:
+            for part in parts:
+                # Only kanji tokens (or unanalyzed text) can contain kanji
+                if part['type'] not in ('kanji', 'unknown'):
+                    continue
+                for run in self.kanji_pattern.findall(part['text']):
+                    for char in run:
+                        seen.setdefault(char, None)
+        return list(seen)
+
+    def _can_annotate(self) -> bool:
+        """Whether any reading source is available"""
+        return self.has_kakasi or (self.has_mecab and self.use_mecab_readings)
+
+    def _build_furigana_line(self, parts: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Render analyzed parts as 漢字(かんじ) text"""
         furigana_text_parts = []
         for part in parts:
             if part['type'] == 'kanji' and part['reading']:
@@ -129,7 +200,9 @@ class FuriganaGenerator:
         """
         parts = []
         
-        if self.has_mecab:
+        if self.has_mecab and self.use_mecab_readings:
+            parts = self._mecab_feature_tokenize(text)
+        elif self.has_mecab:
             parts = self._mecab_tokenize(text)
         else:
             parts = self._kakasi_tokenize(text)
@@ -140,7 +213,8 @@ class FuriganaGenerator:
         """Tokenize using MeCab for better accuracy"""
         parts = []
         
-        parsed = self.mecab.parse(text)
+        with self._mecab_lock:
+            parsed = self.mecab.parse(text)
         words = parsed.strip().split()
         
         for word in words:
@@ -152,6 +226,69 @@ class FuriganaGenerator:
         
         return parts
 
+    def _mecab_feature_tokenize(self, text: str) -> List[Dict[str, str]]:
+        """Tokenize using MeCab and read kanji readings from its dictionary features"""
+        nodes = []
+        with self._mecab_lock:
+            # Nodes belong to the tagger's lattice; copy them out before the next parse
+            node = self.mecab.parseToNode(text)
+            while node:
+                # BOS/EOS nodes have an empty surface
+                if node.surface:
+                    nodes.append((node.surface, node.feature))
+                node = node.next
+        
+        return [self._analyze_node(surface, feature) for surface, feature in nodes]
+
+    def _analyze_node(self, word: str, feature: str) -> Dict[str, str]:
+        """Analyze a MeCab node, falling back to kakasi when the dictionary has no reading"""
+        text_type = self._classify_text_type(word)
+        
+        if text_type == 'kanji':
+            fields = feature.split(',')
+            if len(fields) > self.mecab_reading_field and fields[self.mecab_reading_field] not in ('', '*'):
+                reading = self._katakana_to_hiragana(fields[self.mecab_reading_field])
+                return {
+                    'text': word,
+                    'reading': reading if reading != word else '',
+                    'type': text_type
+                }
+            
+            # Unknown word: MeCab has no reading for it
+            return self._analyze_word(word)
+        
+        return {
+            'text': word,
+            'reading': '',
+            'type': text_type
+        }
+
+    def _katakana_to_hiragana(self, text: str) -> str:
+        """Convert katakana in a reading to hiragana, leaving other characters as-is"""
+        return ''.join(
+            chr(ord(char) - 0x60) if '\u30a1' <= char <= '\u30f6' else char
+            for char in text
+        )
+
+    def _tokenize_lines(self, lines: List[str]) -> List[List[Dict[str, str]]]:
+        """
+        Tokenize several lines, analyzing each distinct line only once
+        
+        Every line is still parsed as its own sentence: joining lines into one
+        MeCab call shifts word boundaries at the line edges.
+        """
+        parts_by_line = {}
+        parts_per_line = []
+        
+        for line in lines:
+            parts = parts_by_line.get(line)
+            if parts is None:
+                parts = self._tokenize_and_analyze(line)
+                parts_by_line[line] = parts
+            parts_per_line.append(parts)
+        
+        return parts_per_line
+
     def _kakasi_tokenize(self, text: str) -> List[Dict[str, str]]:
         """Tokenize using kakasi as fallback"""
         parts = []
@@ -184,17 +321,13 @@ class FuriganaGenerator:
         text_type = self._classify_text_type(word)
         
         if text_type == 'kanji' and self.has_kakasi:
-            try:
-                result = self.kakasi.convert(word)
-                if result:
-                    reading = ''.join([item.get('hira', '') for item in result])
-                    return {
-                        'text': word,
-                        'reading': reading if reading != word else '',
-                        'type': text_type
-                    }
-            except:
-                pass
+            reading = self._lookup_reading(word)
+            if reading is not None:
+                return {
+                    'text': word,
+                    'reading': reading,
+                    'type': text_type
+                }
         
         return {
             'text': word,
@@ -202,6 +335,24 @@ class FuriganaGenerator:
             'type': text_type
         }
 
+    def _lookup_reading(self, word: str) -> Optional[str]:
+        """Return the memoized kakasi reading for a word, or None if conversion fails"""
+        reading = self.reading_cache.get(word)
+        if reading is not None:
+            return reading
+        
+        try:
+            result = self.kakasi.convert(word)
+        except:
+            return None
+        if not result:
+            return None
+        
+        reading = ''.join([item.get('hira', '') for item in result])
+        reading = reading if reading != word else ''
+        self.reading_cache.set(word, reading)
+        return reading
+
     def _classify_text_type(self, text: str) -> str:
         """Classify text as kanji, hiragana, katakana, or other"""
         if not text:
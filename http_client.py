@@ -0,0 +1,105 @@
+import os
+import threading
+from typing import Dict, Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Hosts we talk to constantly get a larger keep-alive pool than the default
+DEFAULT_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+HOST_POOL_MAXSIZE = {
+    # Azure Read polls several times per upload, so it holds the most connections
+    os.getenv('AZURE_OCR_ENDPOINT', ''): int(os.getenv('HTTP_POOL_MAXSIZE_OCR', 20)),
+    os.getenv('TL_AZURE_ENDPOINT', ''): int(os.getenv('HTTP_POOL_MAXSIZE_TRANSLATOR', 10)),
+    os.getenv('TTS_AZURE_ENDPOINT', ''): int(os.getenv('HTTP_POOL_MAXSIZE_TTS', 10)),
+}
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def __init__(self, *args, timeout=None, **kwargs):
+        """HTTPAdapter that applies a default (connect, read) timeout to every request"""
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _base_url(url: str) -> str:
+    """Reduce an endpoint URL to the scheme://host/ prefix requests mounts adapters on"""
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return ''
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+    default_adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+        pool_maxsize=DEFAULT_POOL_MAXSIZE
+    )
+    session.mount('https://', default_adapter)
+    session.mount('http://', default_adapter)
+
+    for endpoint, pool_maxsize in HOST_POOL_MAXSIZE.items():
+        prefix = _base_url(endpoint)
+        if prefix:
+            session.mount(prefix, TimeoutHTTPAdapter(
+                timeout=timeout,
+                pool_connections=1,
+                pool_maxsize=pool_maxsize
+            ))
+
+    return session
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled HTTP session
+
+    Connections are kept alive and reused across requests, so outbound calls
+    to Azure and Google skip the TCP+TLS handshake after the first one. The
+    session is rebuilt after a fork so gunicorn workers never share sockets.
+
+    Returns:
+        requests.Session: Shared session with per-host pools and default timeouts
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Return the configured pool sizes and timeouts for diagnostics"""
+    return {
+        'default_pool_maxsize': DEFAULT_POOL_MAXSIZE,
+        'host_pool_maxsize': {
+            _base_url(endpoint): size for endpoint, size in HOST_POOL_MAXSIZE.items() if _base_url(endpoint)
+        },
+        'connect_timeout': CONNECT_TIMEOUT,
+        'read_timeout': READ_TIMEOUT
+    }
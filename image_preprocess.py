@@ -0,0 +1,211 @@
+import io
+import os
+import threading
+import math
+from typing import Dict, Any, Tuple, List, Optional
+
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+EXIF_ORIENTATION = 0x0112
+# Orientations that rotate the image by 90 degrees, swapping width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+# Azure Read rejects images with a side over this, so such uploads are never sent as-is
+AZURE_READ_MAX_DIMENSION = 10000
+
+
+def tile_spans(length: int, tile_size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Split [0, length) into the fewest equal spans no longer than tile_size
+    where neighbours share `overlap` pixels
+
+    Raises:
+        ValueError: If overlap is negative or not smaller than tile_size
+    """
+    if not 0 <= overlap < tile_size:
+        raise ValueError(f"Tile overlap {overlap} must be at least 0 and smaller than the tile size {tile_size}")
+    if length <= tile_size:
+        return [(0, length)]
+
+    count = math.ceil((length - overlap) / (tile_size - overlap))
+    span = math.ceil((length + (count - 1) * overlap) / count)
+    starts = [min(index * (span - overlap), length - span) for index in range(count)]
+    return [(start, start + span) for start in starts]
+
+
+class ImagePreprocessor:
+    def __init__(self, max_dimension: int = None, jpeg_quality: int = None):
+        """
+        Shrink images before they are sent to Azure Read
+
+        Applies EXIF orientation, scales the long side down to
+        `max_dimension` and drops metadata, re-encoding as JPEG or, for
+        lossless sources such as screenshots and line art, as PNG. Whichever
+        of those and the original upload is smallest is sent, so a payload
+        never grows. Needs Pillow; without it images pass through untouched.
+
+        Args:
+            max_dimension (int): Longest side sent to Azure, defaults to OCR_MAX_DIMENSION or 3200
+            jpeg_quality (int): JPEG quality for re-encoded images, defaults to OCR_JPEG_QUALITY or 90
+        """
+        self.max_dimension = max_dimension or int(os.getenv('OCR_MAX_DIMENSION', 3200))
+        self.jpeg_quality = jpeg_quality or int(os.getenv('OCR_JPEG_QUALITY', 90))
+        self.enabled = HAS_PIL and os.getenv('OCR_PREPROCESS', 'true').lower() != 'false'
+
+        if not HAS_PIL:
+            print("Warning: Pillow not installed, images are sent to OCR unprocessed. Install with: pip install pillow")
+
+        self._lock = threading.Lock()
+        self.images = 0
+        self.resized = 0
+        self.reencoded = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def prepare(self, image_data: bytes) -> Tuple[bytes, float]:
+        """
+        Return the bytes to send to Azure and the factor mapping their pixel
+        coordinates back onto the original (upright) image
+
+        Args:
+            image_data (bytes): Image as uploaded
+
+        Returns:
+            (image bytes, coordinate scale); the scale is 1.0 when the size is unchanged
+        """
+        prepared, scale = image_data, 1.0
+        if self.enabled:
+            try:
+                prepared, scale = self._prepare(image_data)
+            except Exception as e:
+                # Let Azure judge files Pillow cannot read
+                print(f"Image preprocessing skipped: {e}")
+                prepared, scale = image_data, 1.0
+
+        with self._lock:
+            self.images += 1
+            self.resized += scale != 1.0
+            self.reencoded += prepared is not image_data
+            self.bytes_in += len(image_data)
+            self.bytes_out += len(prepared)
+
+        return prepared, scale
+
+    def _prepare(self, image_data: bytes) -> Tuple[bytes, float]:
+        with Image.open(io.BytesIO(image_data)) as image:
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+
+            width, height = image.size
+            if orientation in TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+
+            target = min(1.0, self.max_dimension / max(width, height))
+            target_size = (max(1, round(width * target)), max(1, round(height * target)))
+
+            if target < 0.5 and image.format == 'JPEG':
+                # Let the JPEG decoder skip detail we would throw away anyway
+                image.draft('RGB', target_size if orientation not in TRANSPOSED_ORIENTATIONS else target_size[::-1])
+
+            upright = ImageOps.exif_transpose(image)
+            if target < 1.0:
+                upright = upright.resize(target_size, Image.LANCZOS)
+
+            encoded = self._encode(upright, image.format)
+
+        # Sending the upload unchanged is the same as running without
+        # preprocessing: Azure gets the stored pixels, metadata and all
+        if len(encoded) >= len(image_data) and max(width, height) <= AZURE_READ_MAX_DIMENSION:
+            return image_data, 1.0
+
+        return encoded, (width / target_size[0] if target < 1.0 else 1.0)
+
+    def split_tiles(self, image_data: bytes, tile_size: int, overlap: int) -> Optional[Tuple[int, int, List[Tuple[int, int, int, int, bytes]]]]:
+        """
+        Cut an upright copy of the image into overlapping JPEG or PNG tiles
+
+        Args:
+            image_data (bytes): Image as uploaded
+            tile_size (int): Longest side of a tile
+            overlap (int): Pixels shared by neighbouring tiles
+
+        Returns:
+            (width, height, [(left, top, right, bottom, image bytes), ...]) in
+            upright image coordinates, or None if the image fits in one tile
+            or cannot be decoded
+        """
+        if not HAS_PIL:
+            return None
+
+        try:
+            with Image.open(io.BytesIO(image_data)) as image:
+                width, height = image.size
+                if image.getexif().get(EXIF_ORIENTATION, 1) in TRANSPOSED_ORIENTATIONS:
+                    width, height = height, width
+                if max(width, height) <= tile_size:
+                    return None
+
+                upright = ImageOps.exif_transpose(image)
+                tiles = []
+                for top, bottom in tile_spans(height, tile_size, overlap):
+                    for left, right in tile_spans(width, tile_size, overlap):
+                        tile = self._encode(upright.crop((left, top, right, bottom)), image.format)
+                        tiles.append((left, top, right, bottom, tile))
+        except Exception as e:
+            print(f"Image tiling skipped: {e}")
+            return None
+
+        with self._lock:
+            self.images += 1
+            self.reencoded += 1
+            self.bytes_in += len(image_data)
+            self.bytes_out += sum(len(tile[4]) for tile in tiles)
+
+        return width, height, tiles
+
+    def _encode(self, image, source_format: Optional[str]) -> bytes:
+        """Smallest of a JPEG and, for lossless sources, a PNG encoding of `image`"""
+        encoded = self._encode_jpeg(image)
+        if source_format != 'JPEG':
+            # Flat-colour text such as screenshots and line art compresses far better losslessly
+            encoded = min(encoded, self._encode_png(image), key=len)
+        return encoded
+
+    def _encode_jpeg(self, image) -> bytes:
+        """Encode as baseline JPEG without metadata, flattening transparency onto white"""
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=self.jpeg_quality, optimize=True)
+        return output.getvalue()
+
+    def _encode_png(self, image) -> bytes:
+        """Encode losslessly as PNG without metadata"""
+        if image.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        output = io.BytesIO()
+        image.save(output, format='PNG')
+        return output.getvalue()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many images were shrunk and the bytes saved on the way to Azure"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'max_dimension': self.max_dimension,
+                'images': self.images,
+                'resized': self.resized,
+                'reencoded': self.reencoded,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'bytes_saved': self.bytes_in - self.bytes_out
+            }
@@ -0,0 +1,180 @@
+import os
+import re
+import json
+import time
+import uuid
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class QueueFull(Exception):
+    """Raised when the job queue already holds as many unfinished jobs as it accepts"""
+
+
+class JobQueue:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 result_ttl: Optional[float] = None, directory: Optional[str] = None):
+        """
+        Background jobs with pollable status, shared by every worker on the host
+
+        Jobs run on this process's fixed worker pool, which also caps how many
+        of them call Azure at once. Each job's record is written to
+        `directory` whenever its status changes, so a status poll can be
+        answered by any worker process pointing at the same directory, not
+        only the one that accepted the job. Finished jobs keep their result for
+        `result_ttl` seconds, so a client that disconnects can come back for
+        it instead of submitting the work again.
+
+        Args:
+            workers (int): Jobs run concurrently per process, defaults to OCR_JOB_WORKERS or 4
+            max_pending (int): Unfinished jobs accepted per process, defaults to OCR_JOB_MAX_PENDING or 100
+            result_ttl (float): Seconds finished jobs are kept, defaults to OCR_JOB_RESULT_TTL or 600
+            directory (str): Folder holding job records, defaults to OCR_JOB_DIR or <tmp>/yomi_jobs
+        """
+        self.workers = workers or int(os.getenv('OCR_JOB_WORKERS', 4))
+        self.max_pending = max_pending or int(os.getenv('OCR_JOB_MAX_PENDING', 100))
+        self.result_ttl = result_ttl or float(os.getenv('OCR_JOB_RESULT_TTL', 600))
+        self.directory = directory or os.getenv('OCR_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'yomi_jobs')
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        self._lock = threading.Lock()
+        self._unfinished = {}  # job id -> status, for jobs this process accepted
+        self._last_prune = 0.0
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + '.json')
+
+    def submit(self, func, *args, **kwargs) -> str:
+        """
+        Queue `func(*args, **kwargs)` and return the new job's id
+
+        Raises:
+            QueueFull: If max_pending jobs are already queued or running in this process
+        """
+        with self._lock:
+            if len(self._unfinished) >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull()
+
+            job_id = uuid.uuid4().hex
+            self._unfinished[job_id] = 'queued'
+            self.submitted += 1
+
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        self._write(job)
+        self._prune()
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job_id
+
+    def _run(self, job: Dict[str, Any], func, args, kwargs):
+        with self._lock:
+            self._unfinished[job['id']] = 'running'
+        job.update(status='running', started_at=time.time())
+        self._write(job)
+
+        try:
+            result = func(*args, **kwargs)
+            job.update(status='succeeded', result=result, finished_at=time.time())
+            self._write(job)
+        except Exception as e:
+            job.update(status='failed', result=None, error=str(e), finished_at=time.time())
+            self._write(job)
+
+        with self._lock:
+            del self._unfinished[job['id']]
+            if job['status'] == 'succeeded':
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def _write(self, job: Dict[str, Any]):
+        """
+        Replace the job's record on disk
+
+        Raises:
+            TypeError: If the result cannot be stored as JSON (the job is then marked failed)
+        """
+        data = json.dumps(job, ensure_ascii=False).encode('utf-8')
+
+        # Write to a temp file first so pollers never see a partial record
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, self._path(job['id']))
+        except OSError as e:
+            print(f"Job record write failed: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job's record, or None if it is unknown or has expired"""
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+
+        try:
+            with open(self._path(job_id), 'rb') as job_file:
+                job = json.loads(job_file.read().decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+
+        if job['finished_at'] is not None and job['finished_at'] < time.time() - self.result_ttl:
+            return None
+        return job
+
+    def _prune(self):
+        """Delete expired records, at most once a minute. Shared with other workers, so it goes by file age."""
+        now = time.time()
+        with self._lock:
+            if now - self._last_prune < 60:
+                return
+            self._last_prune = now
+            own = set(self._unfinished)
+
+        # A record is rewritten on every status change, so one untouched for
+        # result_ttl is either long finished or was left by a worker that died
+        cutoff = now - self.result_ttl
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name[:-len('.json')] in own:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's queue depth and job counters"""
+        with self._lock:
+            statuses = list(self._unfinished.values())
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'directory': self.directory,
+                'queued': statuses.count('queued'),
+                'running': statuses.count('running'),
+                'submitted': self.submitted,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,160 @@
+import os
+import mmap
+import struct
+from typing import List, Dict, Any, Optional, Iterable
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'kanji_index.bin')
+
+# Binary index layout (little endian):
+#   header   magic, format version, record count
+#   records  fixed-width, sorted by codepoint so lookups can binary search
+#   heap     UTF-8 strings referenced by (offset, length) pairs from the records
+# The file is memory-mapped read-only, so every worker shares one copy through
+# the OS page cache instead of holding ~13k dicts each.
+INDEX_MAGIC = b'YKJI'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<4sHI')
+# codepoint, frequency rank, stroke count, grade, jlpt, pad, then (offset, length)
+# for meanings, kun readings, on readings and name readings
+RECORD = struct.Struct('<IHBBBx8I')
+CODEPOINT = struct.Struct('<I')
+LIST_FIELDS = ('meanings', 'kun_readings', 'on_readings', 'name_readings')
+LIST_SEPARATOR = '\x1f'
+
+def write_index(records: Iterable[Dict[str, Any]], output_path: str) -> int:
+    """
+    Write kanji records to the binary index format read by KanjiDictionary
+
+    Args:
+        records: Dicts with kanjiapi.dev field names, one per kanji
+        output_path (str): Destination file
+
+    Returns:
+        int: Number of records written
+    """
+    records = sorted((record for record in records if len(record['kanji']) == 1), key=lambda record: ord(record['kanji']))
+
+    heap = bytearray()
+    packed_records = []
+    for record in records:
+        string_refs = []
+        for field in LIST_FIELDS:
+            encoded = LIST_SEPARATOR.join(record.get(field) or []).encode('utf-8')
+            string_refs.extend([len(heap), len(encoded)])
+            heap.extend(encoded)
+
+        packed_records.append(RECORD.pack(
+            ord(record['kanji']),
+            record.get('freq_mainichi_shinbun') or 0,
+            record.get('stroke_count') or 0,
+            record.get('grade') or 0,
+            record.get('jlpt') or 0,
+            *string_refs
+        ))
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as output:
+        output.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(packed_records)))
+        output.writelines(packed_records)
+        output.write(heap)
+    os.replace(temp_path, output_path)
+
+    return len(packed_records)
+
+class KanjiDictionary:
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        In-process kanji metadata lookups backed by a prebuilt local index
+
+        Build the index with build_kanji_index.py. Without it every lookup
+        misses and callers fall back to their previous behaviour.
+
+        Args:
+            index_path (str): Index file, defaults to KANJI_INDEX_PATH or data/kanji_index.bin
+        """
+        self.index_path = index_path or os.getenv('KANJI_INDEX_PATH', DEFAULT_INDEX_PATH)
+        self.count = 0
+        self._mm = None
+
+        try:
+            with open(self.index_path, 'rb') as index_file:
+                self._mm = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            print(f"Warning: kanji index not found at {self.index_path}. Run build_kanji_index.py to create it.")
+            return
+
+        magic, version, count = HEADER.unpack_from(self._mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            print(f"Warning: {self.index_path} is not a version {INDEX_VERSION} kanji index. Rebuild it with build_kanji_index.py.")
+            self._mm.close()
+            self._mm = None
+            return
+
+        self.count = count
+        self._heap_offset = HEADER.size + count * RECORD.size
+
+    @property
+    def available(self) -> bool:
+        return self.count > 0
+
+    def _find_record(self, codepoint: int) -> Optional[int]:
+        """Binary search the sorted records, returning the matching record offset"""
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            current = CODEPOINT.unpack_from(self._mm, offset)[0]
+            if current == codepoint:
+                return offset
+            if current < codepoint:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def _read_list(self, offset: int, length: int) -> List[str]:
+        if not length:
+            return []
+        start = self._heap_offset + offset
+        return self._mm[start:start + length].decode('utf-8').split(LIST_SEPARATOR)
+
+    def lookup(self, kanji: str) -> Optional[Dict[str, Any]]:
+        """Return metadata for a single kanji, or None if it is not in the index"""
+        if not self.count or len(kanji) != 1:
+            return None
+
+        offset = self._find_record(ord(kanji))
+        if offset is None:
+            return None
+
+        codepoint, freq, stroke_count, grade, jlpt, *string_refs = RECORD.unpack_from(self._mm, offset)
+
+        info = {
+            'kanji': kanji,
+            'grade': grade or None,
+            'stroke_count': stroke_count or None,
+            'jlpt': jlpt or None,
+            'unicode': format(codepoint, 'x'),
+            'freq_mainichi_shinbun': freq or None
+        }
+        for index, field in enumerate(LIST_FIELDS):
+            info[field] = self._read_list(string_refs[2 * index], string_refs[2 * index + 1])
+
+        return info
+
+    def lookup_many(self, kanji_list: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Look up several kanji at once
+
+        Args:
+            kanji_list (List[str]): Kanji characters, duplicates allowed
+
+        Returns:
+            Dict mapping each distinct kanji (in first-seen order) to its metadata or None
+        """
+        results = {}
+        for kanji in kanji_list:
+            if kanji not in results:
+                results[kanji] = self.lookup(kanji)
+        return results
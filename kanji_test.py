@@ -1,11 +1,19 @@
 import requests
+from kanji_dict import KanjiDictionary
 
 def fetch_kanji_info(kanji):
-    url = f"https://kanjiapi.dev/v1/kanji/{kanji}"
-    response = requests.get(url)
+    # Prefer the local index; only hit kanjiapi.dev for kanji it does not know
+    data = KanjiDictionary().lookup(kanji)
+    status_code = 200
 
-    if response.status_code == 200:
-        data = response.json()
+    if data is None:
+        url = f"https://kanjiapi.dev/v1/kanji/{kanji}"
+        response = requests.get(url)
+        status_code = response.status_code
+        if status_code == 200:
+            data = response.json()
+
+    if data is not None:
         print(f"Kanji: {data.get('kanji')}")
         print(f"Meanings: {', '.join(data.get('meanings', []))}")
         print(f"On'yomi (音読み): {', '.join(data.get('on_readings', []))}")
@@ -15,7 +23,7 @@ def fetch_kanji_info(kanji):
         print(f"Stroke Count: {data.get('stroke_count')}")
         print(f"Mainichi Newspaper Frequency Rank: {data.get('freq_mainichi_shinbun', 'N/A')}")
     else:
-        print(f"Failed to fetch data for '{kanji}'. Status code: {response.status_code}")
+        print(f"Failed to fetch data for '{kanji}'. Status code: {status_code}")
 
 # Example usage
 if __name__ == "__main__":
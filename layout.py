@@ -0,0 +1,199 @@
+import bisect
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+    print("Warning: numpy not installed, OCR layout analysis runs in pure Python. Install with: pip install numpy")
+
+# A line is vertical (or horizontal) when one side is this much longer than
+# the other; squarer lines, e.g. a single character, follow the page
+ORIENTATION_RATIO = 1.2
+
+
+def analyze_layout(boxes: Sequence[Sequence[float]]) -> Tuple[List[int], List[bool], bool]:
+    """
+    Work out the reading order of the text lines on one page
+
+    Each line is classified as vertical or horizontal from its own box, and
+    the page takes the majority orientation. Lines are then grouped where
+    their extents overlap: into bands stacked top to bottom on vertical pages
+    (manga tiers), or into columns left to right on horizontal ones. Vertical
+    bands read right to left, horizontal columns top to bottom. Lines running
+    the other way (a horizontal caption between manga columns, a vertical
+    heading in horizontal text) form blocks of their own that take their
+    place in the group and are read in their own direction.
+
+    Args:
+        boxes: One Azure Read boundingBox (x1, y1, ..., x4, y4) per line
+
+    Returns:
+        (line indices in reading order, per-line vertical flags, whether the page is vertical)
+    """
+    if not boxes:
+        return [], [], False
+    if HAS_NUMPY:
+        return _analyze_numpy(boxes)
+    return _analyze_python(boxes)
+
+
+def _analyze_numpy(boxes: Sequence[Sequence[float]]) -> Tuple[List[int], List[bool], bool]:
+    # One contiguous row per corner coordinate, so min/max reduce whole rows
+    corners = np.ascontiguousarray(np.array(boxes).reshape(len(boxes), -1).T, dtype=np.float64)
+    xs, ys = corners[0::2], corners[1::2]
+    x0, x1 = xs.min(axis=0), xs.max(axis=0)
+    y0, y1 = ys.min(axis=0), ys.max(axis=0)
+    width, height = x1 - x0, y1 - y0
+
+    tall = height > width * ORIENTATION_RATIO
+    wide = width > height * ORIENTATION_RATIO
+    tall_count, wide_count = int(tall.sum()), int(wide.sum())
+    if tall_count != wide_count:
+        page_vertical = tall_count > wide_count
+    else:
+        page_vertical = bool(height.sum() > width.sum())
+    vertical = np.where(tall | wide, tall, page_vertical)
+
+    # Bands (vertical pages) or columns (horizontal pages) of overlapping
+    # lines, built from the lines running with the page
+    along_start, along_end = (y0, y1) if page_vertical else (x0, x1)
+    across = vertical != page_vertical
+    group = np.empty(len(x0), dtype=np.float64)
+    group[~across], group_start, group_end = _overlap_groups_numpy(along_start[~across], along_end[~across])
+
+    # Lines running against the page join the group their centre falls in, or
+    # a group of their own in the gap between two; inside a group they form
+    # blocks, placed by the block's leading edge and read in their own direction
+    if across.any():
+        centre = (along_start[across] + along_end[across]) / 2
+        position = np.searchsorted(group_start, centre, side='right')
+        inside = (position > 0) & (centre < group_end[np.maximum(position - 1, 0)])
+        group[across] = np.where(inside, position, position + 0.5)
+
+    # lexsort's last key is the primary one
+    if page_vertical:
+        # Columns right to left; a horizontal caption sits at its right edge and reads row by row
+        edge = x1.copy()
+        if across.any():
+            block = _overlap_groups_numpy(x0[across], x1[across], group[across])[0]
+            block_edge = np.full(int(block.max()) + 1, -np.inf)
+            np.maximum.at(block_edge, block, x1[across])
+            edge[across] = block_edge[block]
+        order = np.lexsort((x0, y0, -edge, group))
+    else:
+        # Rows top to bottom; a block of vertical lines sits at its top edge and reads right to left
+        edge = y0.copy()
+        within = x0.copy()
+        if across.any():
+            block = _overlap_groups_numpy(y0[across], y1[across], group[across])[0]
+            block_edge = np.full(int(block.max()) + 1, np.inf)
+            np.minimum.at(block_edge, block, y0[across])
+            edge[across] = block_edge[block]
+            within[across] = -x1[across]
+        order = np.lexsort((y0, within, edge, group))
+
+    return order.tolist(), vertical.tolist(), page_vertical
+
+
+def _overlap_groups_numpy(start, end, outer=None):
+    """
+    Number runs of overlapping [start, end) extents from 1: sweep by start and
+    open a new group wherever an extent begins past every earlier end. With
+    `outer`, extents only join others in the same outer group.
+
+    Returns:
+        (group per extent, start of each group, end of each group)
+    """
+    if outer is not None:
+        # Give every outer group (which may be a half step) its own disjoint stretch of the axis
+        base = start.min()
+        stride = 2 * (end.max() - base + 1)
+        start = start - base + outer * stride
+        end = end - base + outer * stride
+
+    by_start = np.argsort(start, kind='stable')
+    running_end = np.maximum.accumulate(end[by_start])
+    new_group = np.ones(len(by_start), dtype=bool)
+    new_group[1:] = start[by_start][1:] >= running_end[:-1]
+    group = np.empty(len(by_start), dtype=np.int64)
+    group[by_start] = np.cumsum(new_group)
+
+    firsts = np.flatnonzero(new_group)
+    lasts = np.append(firsts[1:] - 1, len(by_start) - 1)
+    return group, start[by_start][firsts], running_end[lasts]
+
+
+def _analyze_python(boxes: Sequence[Sequence[float]]) -> Tuple[List[int], List[bool], bool]:
+    """Same layout as _analyze_numpy, for installs without numpy"""
+    x0, x1, y0, y1 = [], [], [], []
+    for box in boxes:
+        xs, ys = box[0::2], box[1::2]
+        x0.append(float(min(xs)))
+        x1.append(float(max(xs)))
+        y0.append(float(min(ys)))
+        y1.append(float(max(ys)))
+    count = len(boxes)
+    width = [x1[index] - x0[index] for index in range(count)]
+    height = [y1[index] - y0[index] for index in range(count)]
+
+    tall = [height[index] > width[index] * ORIENTATION_RATIO for index in range(count)]
+    wide = [width[index] > height[index] * ORIENTATION_RATIO for index in range(count)]
+    tall_count, wide_count = sum(tall), sum(wide)
+    if tall_count != wide_count:
+        page_vertical = tall_count > wide_count
+    else:
+        page_vertical = sum(height) > sum(width)
+    vertical = [tall[index] if tall[index] or wide[index] else page_vertical for index in range(count)]
+
+    everything = list(range(count))
+    across = [index for index in everything if vertical[index] != page_vertical]
+    along_start, along_end = (y0, y1) if page_vertical else (x0, x1)
+    group, group_start, group_end = _overlap_groups_python(
+        [index for index in everything if vertical[index] == page_vertical], along_start, along_end, [0] * count
+    )
+    for index in across:
+        centre = (along_start[index] + along_end[index]) / 2
+        position = bisect.bisect_right(group_start, centre)
+        inside = position > 0 and centre < group_end[position - 1]
+        group[index] = position if inside else position + 0.5
+
+    if page_vertical:
+        edge = list(x1)
+        block = _overlap_groups_python(across, x0, x1, group)[0]
+        block_edge = {}
+        for index in across:
+            block_edge[block[index]] = max(block_edge.get(block[index], x1[index]), x1[index])
+        for index in across:
+            edge[index] = block_edge[block[index]]
+        order = sorted(everything, key=lambda index: (group[index], -edge[index], y0[index], x0[index]))
+    else:
+        edge = list(y0)
+        within = list(x0)
+        block = _overlap_groups_python(across, y0, y1, group)[0]
+        block_edge = {}
+        for index in across:
+            block_edge[block[index]] = min(block_edge.get(block[index], y0[index]), y0[index])
+        for index in across:
+            edge[index] = block_edge[block[index]]
+            within[index] = -x1[index]
+        order = sorted(everything, key=lambda index: (group[index], edge[index], within[index], y0[index]))
+
+    return order, vertical, page_vertical
+
+
+def _overlap_groups_python(indices: List[int], start: List[float], end: List[float], outer: List[float]):
+    """_overlap_groups_numpy for the lines in `indices`, as ({index: group}, group starts, group ends)"""
+    group = {}
+    group_start, group_end = [], []
+    current_outer = None
+    for index in sorted(indices, key=lambda index: (outer[index], start[index])):
+        if outer[index] != current_outer or start[index] >= group_end[-1]:
+            current_outer = outer[index]
+            group_start.append(start[index])
+            group_end.append(end[index])
+        else:
+            group_end[-1] = max(group_end[-1], end[index])
+        group[index] = len(group_start)
+    return group, group_start, group_end
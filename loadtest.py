@@ -0,0 +1,179 @@
+"""
+Load test for /api/upload, comparing the sync (gunicorn) and async (uvicorn) servers
+
+Usage:
+    python loadtest.py mock [--port 8900] [--ocr-latency 2.0] [--translate-latency 0.2]
+    python loadtest.py run URL [--requests 200] [--concurrency 100] [--image path.png]
+
+`mock` stands in for Azure Read, Translator and Speech with fixed latencies,
+so runs are repeatable and cost nothing. Point the backend at it with
+AZURE_OCR_ENDPOINT, TL_AZURE_ENDPOINT and TTS_AZURE_ENDPOINT set to
+http://127.0.0.1:<port>, and set OCR_CACHE_MAX_BYTES=0 (`run` also makes every
+upload unique) so each request goes through the full OCR cycle.
+
+`run` fires uploads with a fixed number in flight and reports throughput and
+latency percentiles, e.g. with the mock running:
+    gunicorn --workers 2 --bind 127.0.0.1:8000 app:app
+    python loadtest.py run http://127.0.0.1:8000/api/upload
+    uvicorn --workers 2 --port 8001 asgi:app
+    python loadtest.py run http://127.0.0.1:8001/api/upload
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+from typing import List, Dict, Any
+
+import httpx
+
+# Smallest valid PNG (1x1); a random tail after IEND keeps each upload's cache key unique
+TINY_PNG = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108000000003a7e9b55'
+    '0000000a4944415478da63f80f00010101001cb08c990000000049454e44ae426082'
+)
+
+MOCK_LINES = ['今日は良い天気ですね', '明日は雨が降るでしょう', '日本語を勉強しています']
+
+
+def build_mock_app(ocr_latency: float, translate_latency: float):
+    """Starlette app imitating the Azure endpoints Yomi calls"""
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    operations = {}  # operation id -> time the result becomes ready
+
+    async def analyze(request):
+        await request.body()
+        operation_id = uuid.uuid4().hex
+        operations[operation_id] = time.monotonic() + ocr_latency
+        location = f"{request.base_url}vision/v3.2/read/analyzeResults/{operation_id}"
+        return Response(status_code=202, headers={'Operation-Location': location})
+
+    async def analyze_result(request):
+        ready_at = operations.get(request.path_params['operation_id'])
+        if ready_at is None:
+            return JSONResponse({'error': 'unknown operation'}, status_code=404)
+        if time.monotonic() < ready_at:
+            return JSONResponse({'status': 'running'})
+
+        del operations[request.path_params['operation_id']]
+        lines = [
+            {
+                'text': text,
+                'boundingBox': [10, 10 + 40 * index, 400, 10 + 40 * index, 400, 40 + 40 * index, 10, 40 + 40 * index],
+                'words': [{'text': text, 'confidence': 0.98}]
+            }
+            for index, text in enumerate(MOCK_LINES)
+        ]
+        return JSONResponse({
+            'status': 'succeeded',
+            'analyzeResult': {'readResults': [{'page': 1, 'width': 420, 'height': 200, 'lines': lines}]}
+        })
+
+    async def translate(request):
+        body = await request.json()
+        await asyncio.sleep(translate_latency)
+        return JSONResponse([{'translations': [{'text': f"[en] {item['text']}", 'to': 'en'}]} for item in body])
+
+    async def synthesize(request):
+        await request.body()
+        await asyncio.sleep(translate_latency)
+        return Response(b'ID3' + os.urandom(2048), media_type='audio/mpeg')
+
+    return Starlette(routes=[
+        Route('/vision/v3.2/read/analyze', analyze, methods=['POST']),
+        Route('/vision/v3.2/read/analyzeResults/{operation_id}', analyze_result),
+        Route('/translate', translate, methods=['POST']),
+        Route('/cognitiveservices/v1', synthesize, methods=['POST'])
+    ])
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_load(url: str, total: int, concurrency: int, image: bytes, timeout: float) -> Dict[str, Any]:
+    """Send `total` uploads, `concurrency` at a time, and collect latencies"""
+    latencies = []
+    errors = {}
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                files = {'file': ('page.png', image + os.urandom(16), 'image/png')}
+                started = time.perf_counter()
+                try:
+                    response = await client.post(url, files=files)
+                    outcome = response.status_code
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                if outcome == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[outcome] = errors.get(outcome, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {'elapsed': elapsed, 'latencies': latencies, 'errors': errors}
+
+
+def report(url: str, total: int, concurrency: int, result: Dict[str, Any]):
+    latencies = result['latencies']
+    print(f"{url}: {total} uploads, {concurrency} concurrent")
+    print(f"  ok {len(latencies)}  errors {result['errors'] or 0}")
+    print(f"  wall {result['elapsed']:.1f}s  throughput {len(latencies) / result['elapsed']:.1f} req/s")
+    if latencies:
+        print(f"  latency p50 {percentile(latencies, 0.5):.2f}s  p95 {percentile(latencies, 0.95):.2f}s  "
+              f"p99 {percentile(latencies, 0.99):.2f}s  max {max(latencies):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    mock = commands.add_parser('mock', help='serve fake Azure endpoints')
+    mock.add_argument('--port', type=int, default=8900)
+    mock.add_argument('--ocr-latency', type=float, default=2.0, help='seconds until a Read operation succeeds')
+    mock.add_argument('--translate-latency', type=float, default=0.2, help='seconds per Translator/Speech call')
+
+    run = commands.add_parser('run', help='load an /api/upload endpoint')
+    run.add_argument('url')
+    run.add_argument('--requests', type=int, default=200)
+    run.add_argument('--concurrency', type=int, default=100)
+    run.add_argument('--image', help='image to upload (default: a 1x1 PNG)')
+    run.add_argument('--timeout', type=float, default=120)
+
+    args = parser.parse_args()
+
+    if args.command == 'mock':
+        import uvicorn
+        uvicorn.run(build_mock_app(args.ocr_latency, args.translate_latency), host='127.0.0.1', port=args.port, log_level='warning')
+        return
+
+    image = TINY_PNG
+    if args.image:
+        with open(args.image, 'rb') as image_file:
+            image = image_file.read()
+
+    result = asyncio.run(run_load(args.url, args.requests, args.concurrency, image, args.timeout))
+    report(args.url, args.requests, args.concurrency, result)
+    if not result['latencies']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,30 @@
 import os
-import requests
 import json
-from typing import List, Dict, Any
+import tempfile
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Union, BinaryIO
 from dotenv import load_dotenv
 
+from cache import DiskLRUCache, make_cache_key
+from http_client import get_session
+from image_preprocess import ImagePreprocessor
+from layout import analyze_layout
+
 load_dotenv()
 
+OCR_API_VERSION = 'v3.2'
+# Bump whenever _parse_ocr_result's output changes, so cached results are re-parsed
+OCR_RESULT_FORMAT = '2'
+
+READING_DIRECTIONS = {True: 'vertical (right-to-left)', False: 'horizontal (top-to-bottom)'}
+
+# A line box ending this close to a tile edge shared with another tile may be cut off there
+TILE_EDGE_MARGIN = 4
+# Lines from different tiles covering this much of the smaller box are the same line
+TILE_DUPLICATE_OVERLAP = 0.5
+
 class AzureOCR:
     def __init__(self):
         """Initialize Azure OCR client with credentials from .env file"""
@@ -17,76 +36,378 @@ class AzureOCR:
         
         self.endpoint = self.endpoint.rstrip('/')
         
-        self.ocr_url = f"{self.endpoint}/vision/v3.2/read/analyze"
+        self.ocr_url = f"{self.endpoint}/vision/{OCR_API_VERSION}/read/analyze"
         
         self.headers = {
             'Ocp-Apim-Subscription-Key': self.key,
             'Content-Type': 'application/octet-stream'
         }
+        
+        # Polling backoff: start short so small images return quickly, cap the
+        # interval for large ones and give up after the overall timeout
+        self.poll_initial_interval = float(os.getenv('AZURE_OCR_POLL_INITIAL', 0.25))
+        self.poll_max_interval = float(os.getenv('AZURE_OCR_POLL_MAX', 2.0))
+        self.poll_timeout = float(os.getenv('AZURE_OCR_POLL_TIMEOUT', 60))
+        
+        # Downscale/re-encode before upload; results are keyed and reported
+        # against the original image
+        self.preprocessor = ImagePreprocessor()
+        
+        # Optional tiling: images with a side over tile_size are cut into
+        # overlapping tiles that are read concurrently instead of downscaled
+        self.tiling = os.getenv('OCR_TILING', 'false').lower() == 'true'
+        self.tile_size = int(os.getenv('OCR_TILE_SIZE', 3200))
+        self.tile_overlap = int(os.getenv('OCR_TILE_OVERLAP', 256))
+        self.tile_concurrency = int(os.getenv('OCR_TILE_CONCURRENCY', 4))
+        if self.tile_size <= 0:
+            raise ValueError("OCR_TILE_SIZE must be positive")
+        if not 0 <= self.tile_overlap < self.tile_size:
+            raise ValueError("OCR_TILE_OVERLAP must be at least 0 and smaller than OCR_TILE_SIZE")
+        if self.tile_concurrency < 1:
+            raise ValueError("OCR_TILE_CONCURRENCY must be at least 1")
+        self._tile_executor = ThreadPoolExecutor(max_workers=self.tile_concurrency, thread_name_prefix='ocr-tile')
+        
+        # Parsed results keyed by image content, so repeat uploads skip Azure
+        cache_max_bytes = int(os.getenv('OCR_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        if cache_max_bytes > 0:
+            cache_dir = os.getenv('OCR_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'yomi_ocr_cache')
+            self.cache = DiskLRUCache(cache_dir, cache_max_bytes, suffix='.json')
+        else:
+            self.cache = None
 
-    def extract_text_from_image(self, image_path: str) -> Dict[str, Any]:
+    def extract_text_from_image(self, image: Union[str, bytes, BinaryIO], tile: Optional[bool] = None) -> Dict[str, Any]:
         """
-        Extract Japanese text from an image file
+        Extract Japanese text from an image
         
         Args:
-            image_path (str): Path to the image file
+            image: Path to an image file, the image bytes, or a binary file
+                object (e.g. an upload's stream) read from its current position
+            tile (bool): Read large images as overlapping tiles, defaults to OCR_TILING
             
         Returns:
             Dict containing extracted text and metadata
         """
         try:
-            with open(image_path, 'rb') as image_file:
-                image_data = image_file.read()
-            
-            response = requests.post(
-                self.ocr_url,
-                headers=self.headers,
-                data=image_data
-            )
+            image_data = self._read_image(image)
             
-            if response.status_code != 202:
-                raise Exception(f"OCR request failed: {response.status_code} - {response.text}")
+            tile = self.tiling if tile is None else tile
+            cache_key, cached = self._cached_result(image_data, tile)
+            if cached is not None:
+                return cached
             
-            operation_location = response.headers.get('Operation-Location')
-            if not operation_location:
-                raise Exception("No operation location received")
+            tiles = self._split_tiles(image_data, tile)
+            if tiles is not None:
+                width, height, tile_list = tiles
+                tile_results = list(self._tile_executor.map(lambda tile_info: self._analyze(tile_info[4]), tile_list))
+                result = self._merge_tile_results(width, height, tile_list, tile_results)
+            else:
+                upload_data, scale = self.preprocessor.prepare(image_data)
+                result = self._analyze(upload_data)
+                self._scale_read_result(result, scale)
             
-            result = self._poll_for_result(operation_location)
+            parsed_result = self._parse_ocr_result(result)
+            self._store_result(cache_key, parsed_result)
             
-            return self._parse_ocr_result(result)
+            return parsed_result
             
         except FileNotFoundError:
-            raise FileNotFoundError(f"Image file not found: {image_path}")
+            raise FileNotFoundError(f"Image file not found: {image}")
+        except Exception as e:
+            raise Exception(f"OCR processing failed: {str(e)}")
+
+    async def extract_text_from_image_async(self, image: Union[bytes, BinaryIO], client, tile: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Async variant of extract_text_from_image for the ASGI server
+        
+        Waits between polls with asyncio.sleep, so one event loop can keep
+        many OCR operations in flight.
+        
+        Args:
+            image: Image bytes or a binary file object
+            client (httpx.AsyncClient): Shared async HTTP client
+            tile (bool): Read large images as overlapping tiles, defaults to OCR_TILING
+            
+        Returns:
+            Dict containing extracted text and metadata
+        """
+        try:
+            image_data = self._read_image(image)
+            tile = self.tiling if tile is None else tile
+            
+            # Hashing, cache file I/O (under a lock the job threads share),
+            # decoding, cropping and resizing all stay off the event loop
+            loop = asyncio.get_running_loop()
+            cache_key, cached = await loop.run_in_executor(None, self._cached_result, image_data, tile)
+            if cached is not None:
+                return cached
+            
+            tiles = await loop.run_in_executor(None, self._split_tiles, image_data, tile)
+            if tiles is not None:
+                width, height, tile_list = tiles
+                slots = asyncio.Semaphore(self.tile_concurrency)
+                
+                async def analyze_tile(tile_info):
+                    async with slots:
+                        return await self._analyze_async(tile_info[4], client)
+                
+                tile_results = await asyncio.gather(*(analyze_tile(tile_info) for tile_info in tile_list))
+                result = self._merge_tile_results(width, height, tile_list, tile_results)
+            else:
+                upload_data, scale = await loop.run_in_executor(None, self.preprocessor.prepare, image_data)
+                result = await self._analyze_async(upload_data, client)
+                self._scale_read_result(result, scale)
+            
+            parsed_result = self._parse_ocr_result(result)
+            await loop.run_in_executor(None, self._store_result, cache_key, parsed_result)
+            
+            return parsed_result
+            
         except Exception as e:
             raise Exception(f"OCR processing failed: {str(e)}")
 
-    def _poll_for_result(self, operation_location: str) -> Dict[str, Any]:
-        """Poll the operation location until OCR processing is complete"""
-        import time
+    def _analyze(self, upload_data: bytes) -> Dict[str, Any]:
+        """Submit one image to Azure Read and wait for the raw result"""
+        response = get_session().post(
+            self.ocr_url,
+            headers=self.headers,
+            data=upload_data
+        )
+        return self._poll_for_result(self._operation_location(response))
+
+    async def _analyze_async(self, upload_data: bytes, client) -> Dict[str, Any]:
+        """_analyze through an httpx.AsyncClient"""
+        response = await client.post(self.ocr_url, headers=self.headers, content=upload_data)
+        return await self._poll_for_result_async(self._operation_location(response), client)
+
+    @staticmethod
+    def _operation_location(response) -> str:
+        """Return the URL to poll from an analyze response, or raise if the request was refused"""
+        if response.status_code != 202:
+            raise Exception(f"OCR request failed: {response.status_code} - {response.text}")
+        
+        operation_location = response.headers.get('Operation-Location')
+        if not operation_location:
+            raise Exception("No operation location received")
+        return operation_location
+
+    def _split_tiles(self, image_data: bytes, tile: bool):
+        """Tiles for an image when tiling applies, else None (see ImagePreprocessor.split_tiles)"""
+        if not tile:
+            return None
+        return self.preprocessor.split_tiles(image_data, self.tile_size, self.tile_overlap)
+
+    @staticmethod
+    def _merge_tile_results(width: int, height: int, tiles: List[Tuple], tile_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine per-tile Read results into a single-page result for the whole image
+        
+        Boxes are shifted by each tile's offset. A line near a seam is usually
+        read by both neighbouring tiles, and may be cut off in one of them, so
+        lines whose boxes largely overlap a line from another tile are dropped,
+        keeping the one not touching a seam and then the longer text.
         
+        Args:
+            width (int): Upright image width
+            height (int): Upright image height
+            tiles (List[Tuple]): (left, top, right, bottom, ...) per tile
+            tile_results (List[Dict]): Raw Read result per tile, in the same order
+            
+        Returns:
+            Dict shaped like a raw Read result, for _parse_ocr_result
+        """
+        candidates = []
+        for tile_index, (tile_info, result) in enumerate(zip(tiles, tile_results)):
+            left, top, right, bottom = tile_info[:4]
+            for page in result.get('analyzeResult', {}).get('readResults', []):
+                for line in page.get('lines', []):
+                    box = [value + (left if index % 2 == 0 else top) for index, value in enumerate(line.get('boundingBox', []))]
+                    if not box:
+                        continue
+                    words = [
+                        dict(word, boundingBox=[value + (left if index % 2 == 0 else top) for index, value in enumerate(word.get('boundingBox', []))])
+                        for word in line.get('words', [])
+                    ]
+                    rect = (min(box[0::2]), min(box[1::2]), max(box[0::2]), max(box[1::2]))
+                    
+                    # Which interior edges (shared with another tile) the line is close to
+                    cut = (
+                        (left > 0 and rect[0] - left <= TILE_EDGE_MARGIN) or
+                        (top > 0 and rect[1] - top <= TILE_EDGE_MARGIN) or
+                        (right < width and right - rect[2] <= TILE_EDGE_MARGIN) or
+                        (bottom < height and bottom - rect[3] <= TILE_EDGE_MARGIN)
+                    )
+                    near_seam = any(
+                        not (rect[2] <= other[0] or rect[0] >= other[2] or rect[3] <= other[1] or rect[1] >= other[3])
+                        for other_index, other in enumerate(tiles) if other_index != tile_index
+                    )
+                    candidates.append((dict(line, boundingBox=box, words=words), rect, tile_index, cut, near_seam))
+        
+        merged = []
+        seam_lines = []  # (rect, tile index) of kept lines that fall inside another tile too
+        for line, rect, tile_index, cut, near_seam in sorted(candidates, key=lambda item: (item[3], -len(item[0].get('text', '')))):
+            if near_seam:
+                if any(other_tile != tile_index and AzureOCR._overlap_ratio(rect, other_rect) > TILE_DUPLICATE_OVERLAP
+                       for other_rect, other_tile in seam_lines):
+                    continue
+                seam_lines.append((rect, tile_index))
+            merged.append(line)
+        
+        return {
+            'status': 'succeeded',
+            'analyzeResult': {
+                'readResults': [{'page': 1, 'width': width, 'height': height, 'unit': 'pixel', 'lines': merged}]
+            }
+        }
+
+    @staticmethod
+    def _overlap_ratio(a: Tuple, b: Tuple) -> float:
+        """Intersection of two (x0, y0, x1, y1) rectangles as a fraction of the smaller one"""
+        overlap_width = min(a[2], b[2]) - max(a[0], b[0])
+        overlap_height = min(a[3], b[3]) - max(a[1], b[1])
+        if overlap_width <= 0 or overlap_height <= 0:
+            return 0.0
+        smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+        return overlap_width * overlap_height / smaller if smaller > 0 else 0.0
+
+    @staticmethod
+    def _read_image(image: Union[str, bytes, BinaryIO]) -> bytes:
+        """Return the encoded image from a path, bytes-like object or binary file object"""
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return bytes(image)
+        if hasattr(image, 'read'):
+            return image.read()
+        with open(image, 'rb') as image_file:
+            return image_file.read()
+
+    def _cached_result(self, image_data: bytes, tile: bool = False):
+        """Return (cache key, cached parsed result or None) for an image"""
+        # Tiled reads of large images differ from downscaled ones, so they get their own entries
+        if tile:
+            cache_key = make_cache_key(OCR_API_VERSION, OCR_RESULT_FORMAT, f"tiles:{self.tile_size}:{self.tile_overlap}", image_data)
+        else:
+            cache_key = make_cache_key(OCR_API_VERSION, OCR_RESULT_FORMAT, image_data)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cache_key, json.loads(cached.decode('utf-8'))
+        return cache_key, None
+
+    def _store_result(self, cache_key: str, parsed_result: Dict[str, Any]):
+        if self.cache is not None:
+            self.cache.set(cache_key, json.dumps(parsed_result, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _scale_read_result(result: Dict[str, Any], scale: float):
+        """Map Read coordinates from the preprocessed image back onto the uploaded one, in place"""
+        if scale == 1.0:
+            return
+        
+        for page in result.get('analyzeResult', {}).get('readResults', []):
+            page['width'] = round(page.get('width', 0) * scale)
+            page['height'] = round(page.get('height', 0) * scale)
+            for line in page.get('lines', []):
+                line['boundingBox'] = [round(value * scale) for value in line.get('boundingBox', [])]
+                for word in line.get('words', []):
+                    word['boundingBox'] = [round(value * scale) for value in word.get('boundingBox', [])]
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Return OCR cache hit/miss counters, or None when caching is disabled"""
+        if self.cache is None:
+            return None
+        return self.cache.stats()
+
+    def _poll_for_result(self, operation_location: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Poll the operation location until OCR processing is complete
+        
+        Starts with short intervals and backs off exponentially, honoring any
+        Retry-After header Azure sends, until the overall timeout expires.
+        
+        Args:
+            operation_location (str): URL returned by the analyze request
+            timeout (float): Seconds to wait in total, defaults to AZURE_OCR_POLL_TIMEOUT
+            
+        Returns:
+            Dict containing the raw Azure Read result
+        """
         headers = {'Ocp-Apim-Subscription-Key': self.key}
         
+        if timeout is None:
+            timeout = self.poll_timeout
+        deadline = time.monotonic() + timeout
+        interval = self.poll_initial_interval
+        
         while True:
-            response = requests.get(operation_location, headers=headers)
+            response = get_session().get(operation_location, headers=headers)
             
-            if response.status_code != 200:
-                raise Exception(f"Failed to get OCR result: {response.status_code}")
+            result = self._poll_status(response)
+            if result is not None:
+                return result
             
-            result = response.json()
-            status = result.get('status')
+            delay = self._next_poll_delay(response, interval)
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"OCR result not ready after {timeout:.0f} seconds")
             
-            if status == 'succeeded':
+            time.sleep(delay)
+            interval = min(interval * 2, self.poll_max_interval)
+
+    async def _poll_for_result_async(self, operation_location: str, client, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """_poll_for_result with the same backoff, yielding to the event loop between polls"""
+        headers = {'Ocp-Apim-Subscription-Key': self.key}
+        
+        if timeout is None:
+            timeout = self.poll_timeout
+        deadline = time.monotonic() + timeout
+        interval = self.poll_initial_interval
+        
+        while True:
+            response = await client.get(operation_location, headers=headers)
+            
+            result = self._poll_status(response)
+            if result is not None:
                 return result
-            elif status == 'failed':
-                raise Exception("OCR processing failed on Azure side")
-            elif status in ['notStarted', 'running']:
-                time.sleep(1) 
-            else:
-                raise Exception(f"Unknown status: {status}")
+            
+            delay = self._next_poll_delay(response, interval)
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"OCR result not ready after {timeout:.0f} seconds")
+            
+            await asyncio.sleep(delay)
+            interval = min(interval * 2, self.poll_max_interval)
+
+    @staticmethod
+    def _poll_status(response) -> Optional[Dict[str, Any]]:
+        """Return the finished Read result, None if it is still running (or throttled), or raise on failure"""
+        if response.status_code == 429:
+            # Throttled; wait as instructed and try again
+            return None
+        if response.status_code != 200:
+            raise Exception(f"Failed to get OCR result: {response.status_code}")
+        
+        result = response.json()
+        status = result.get('status')
+        
+        if status == 'succeeded':
+            return result
+        elif status == 'failed':
+            raise Exception("OCR processing failed on Azure side")
+        elif status not in ['notStarted', 'running']:
+            raise Exception(f"Unknown status: {status}")
+        return None
+
+    @staticmethod
+    def _next_poll_delay(response, interval: float) -> float:
+        """Pick the wait before the next poll, preferring the server's Retry-After hint"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), interval)
+            except ValueError:
+                pass
+        return interval
 
     def _parse_ocr_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Parse OCR result, sort lines based on orientation, and extract text.
+        Parse OCR result, put lines in reading order (see layout.analyze_layout), and extract text.
         """
         parsed_result = {
             'full_text': '',
@@ -103,44 +424,32 @@ class AzureOCR:
         for page_idx, page in enumerate(read_results):
             lines = page.get('lines', [])
             
-            # --- START: FIX ---
             # If there are no lines, skip to the next page
             if not lines:
                 continue
 
-            # 1. Detect Orientation
-            # Calculate average dimensions of line bounding boxes
-            avg_height = sum(line['boundingBox'][7] - line['boundingBox'][1] for line in lines) / len(lines)
-            avg_width = sum(line['boundingBox'][2] - line['boundingBox'][0] for line in lines) / len(lines)
-            is_vertical = avg_height > avg_width
-
-            # 2. Apply Conditional Sorting
-            if is_vertical:
-                # For vertical text (like manga), sort columns from right-to-left
-                parsed_result['reading_direction'] = 'vertical (right-to-left)'
-                # Sort by the leftmost X-coordinate, in descending order
-                lines.sort(key=lambda line: line['boundingBox'][0], reverse=True)
-            else:
-                # For horizontal text, sort lines from top-to-bottom
-                parsed_result['reading_direction'] = 'horizontal (top-to-bottom)'
-                # Sort by the topmost Y-coordinate, in ascending order
-                lines.sort(key=lambda line: line['boundingBox'][1])
-            # --- END: FIX ---
+            # Orientation per line, grouping into columns/bands and reading order
+            order, line_vertical, is_vertical = analyze_layout([line['boundingBox'] for line in lines])
+            reading_direction = READING_DIRECTIONS[is_vertical]
+            parsed_result['reading_direction'] = reading_direction
 
             page_info = {
                 'page_number': page_idx + 1,
                 'width': page.get('width', 0),
                 'height': page.get('height', 0),
+                'reading_direction': reading_direction,
                 'lines': []
             }
             
-            for line in lines: # This loop now iterates over the CORRECTLY SORTED lines
+            for index in order:
+                line = lines[index]
                 text = line.get('text', '')
                 bounding_box = line.get('boundingBox', [])
                 
                 line_info = {
                     'text': text,
                     'bounding_box': bounding_box,
+                    'orientation': 'vertical' if line_vertical[index] else 'horizontal',
                     'confidence': self._calculate_line_confidence(line)
                 }
                 
@@ -0,0 +1,111 @@
+import os
+import threading
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Union
+
+
+class HasherBusy(Exception):
+    """Raised when more request threads are waiting on bcrypt than the hasher accepts"""
+
+
+class PasswordHasher:
+    def __init__(self, rounds: Optional[int] = None, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        bcrypt hashing and verification with a cap on concurrent work
+
+        This does not free the calling thread: a request thread still waits
+        for its hash. What the pool bounds is how many bcrypt computations run
+        at once, so a login burst cannot occupy every CPU that OCR parsing and
+        furigana need. Callers beyond `max_pending` (running plus waiting) get
+        HasherBusy, answered with 429, instead of queueing behind the burst.
+
+        Backpressure needs more concurrent callers than `max_pending`: under
+        the ASGI server that is ASGI_WSGI_WORKERS threads per process (10 by
+        default), while a gunicorn sync worker has a single request thread and
+        never queues here.
+
+        Args:
+            rounds (int): bcrypt cost for new hashes, defaults to BCRYPT_ROUNDS or 12
+            workers (int): Hashes computed at once, defaults to BCRYPT_WORKERS or min(4, CPU count)
+            max_pending (int): Callers accepted at once, defaults to BCRYPT_MAX_PENDING or 2 per worker
+        """
+        self.rounds = rounds or int(os.getenv('BCRYPT_ROUNDS', 12))
+        self.workers = workers or int(os.getenv('BCRYPT_WORKERS', min(4, os.cpu_count() or 1)))
+        self.max_pending = max_pending or int(os.getenv('BCRYPT_MAX_PENDING', self.workers * 2))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _run(self, func, *args):
+        """Run `func` on the pool and wait for it, or raise HasherBusy if too many callers are waiting"""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._finish()
+            raise
+        future.add_done_callback(lambda _: self._finish())
+        return future.result()
+
+    def _finish(self):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    def hash(self, password: str) -> bytes:
+        """Hash `password` at the configured cost"""
+        return self._run(self._hash, password)
+
+    def _hash(self, password: str) -> bytes:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.rounds))
+
+    def verify(self, password: str, hashed_password: Optional[Union[bytes, str]]) -> bool:
+        """
+        Check `password` against a stored hash
+
+        Accounts without a password (e.g. created through Google sign-in)
+        never match, and are rejected without touching the pool.
+        """
+        if not hashed_password:
+            return False
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed_password)
+
+    def needs_rehash(self, hashed_password: Optional[Union[bytes, str]]) -> bool:
+        """True if `hashed_password` was made with a different cost than the configured one"""
+        if not hashed_password:
+            return False
+        if isinstance(hashed_password, str):
+            hashed_password = hashed_password.encode('utf-8')
+        try:
+            # $2b$<cost>$<salt+digest>
+            return int(hashed_password.split(b'$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool size, queue depth and rejection counters"""
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'queued': max(0, self.pending - self.workers),
+                'peak_pending': self.peak_pending,
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
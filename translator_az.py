@@ -0,0 +1,209 @@
+import os
+import uuid
+from typing import List, Dict, Any, Optional
+from dotenv import load_dotenv
+
+from cache import LRUCache
+from http_client import get_session
+
+load_dotenv()
+
+# Azure Translator v3 request limits
+MAX_BATCH_ITEMS = 1000
+MAX_BATCH_CHARS = 50000
+
+class AzureTranslator:
+    def __init__(self):
+        """Initialize Azure Translator client with credentials from .env file"""
+        self.endpoint = os.getenv('TL_AZURE_ENDPOINT')
+        self.key = os.getenv('TL_AZURE_KEY')
+        self.region = os.getenv('TL_AZURE_REGION', 'centralindia')
+
+        # (text, source, target) -> translation, shared by every request in the process
+        self.cache = LRUCache(int(os.getenv('TRANSLATION_CACHE_SIZE', 10000)))
+
+    def translate(self, text: str, source_lang: str = 'ja', target_lang: str = 'en') -> Optional[str]:
+        """
+        Translate a single text
+
+        Args:
+            text (str): Text to translate
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+
+        Returns:
+            str: Translated text, or None if translation failed
+        """
+        return self.translate_batch([text], source_lang, target_lang)[0]
+
+    async def translate_async(self, text: str, source_lang: str = 'ja', target_lang: str = 'en', client=None) -> Optional[str]:
+        """translate() through an httpx.AsyncClient"""
+        return (await self.translate_batch_async([text], source_lang, target_lang, client))[0]
+
+    def translate_batch(self, texts: List[str], source_lang: str = 'ja', target_lang: str = 'en') -> List[Optional[str]]:
+        """
+        Translate many texts with as few Translator requests as possible
+
+        Cached and repeated texts are not sent; the rest go out in arrays split
+        only where Azure's per-request item and character limits require it.
+
+        Args:
+            texts (List[str]): Texts to translate, e.g. OCR lines or sentences
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+
+        Returns:
+            List with one translation per input text (None where translation failed)
+        """
+        results, pending = self._from_cache(texts, source_lang, target_lang)
+
+        for chunk in self._chunk_texts(list(pending)):
+            translations = self._request_translations(chunk, source_lang, target_lang)
+            self._fill_results(results, pending, chunk, translations, source_lang, target_lang)
+
+        return results
+
+    async def translate_batch_async(self, texts: List[str], source_lang: str = 'ja', target_lang: str = 'en', client=None) -> List[Optional[str]]:
+        """
+        translate_batch for the ASGI server, sending requests through `client`
+
+        Args:
+            texts (List[str]): Texts to translate
+            source_lang (str): Source language code
+            target_lang (str): Target language code
+            client (httpx.AsyncClient): Shared async HTTP client
+
+        Returns:
+            List with one translation per input text (None where translation failed)
+        """
+        results, pending = self._from_cache(texts, source_lang, target_lang)
+
+        for chunk in self._chunk_texts(list(pending)):
+            translations = await self._request_translations_async(client, chunk, source_lang, target_lang)
+            self._fill_results(results, pending, chunk, translations, source_lang, target_lang)
+
+        return results
+
+    def _from_cache(self, texts: List[str], source_lang: str, target_lang: str):
+        """Return (results with cached and blank texts filled in, {text: indices} still to translate)"""
+        results = [None] * len(texts)
+        pending = {}  # text -> indices waiting for it
+
+        for index, text in enumerate(texts):
+            if not text or not text.strip():
+                results[index] = text
+                continue
+
+            cached = self.cache.get((text, source_lang, target_lang))
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.setdefault(text, []).append(index)
+
+        return results, pending
+
+    def _fill_results(self, results, pending, chunk, translations, source_lang, target_lang):
+        """Cache one request's translations and copy them to every index waiting on them"""
+        if translations is None:
+            return
+
+        for text, translated in zip(chunk, translations):
+            if translated is None:
+                continue
+            self.cache.set((text, source_lang, target_lang), translated)
+            for index in pending[text]:
+                results[index] = translated
+
+    def _chunk_texts(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into request-sized groups"""
+        chunks = []
+        current = []
+        current_chars = 0
+
+        for text in texts:
+            if current and (len(current) >= MAX_BATCH_ITEMS or current_chars + len(text) > MAX_BATCH_CHARS):
+                chunks.append(current)
+                current = []
+                current_chars = 0
+            current.append(text)
+            current_chars += len(text)
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+    def _request_translations(self, texts: List[str], source_lang: str, target_lang: str) -> Optional[List[Optional[str]]]:
+        """Send one Translator request for a group of texts"""
+        try:
+            request_args = self._build_request(texts, source_lang, target_lang)
+            if request_args is None:
+                return None
+
+            response = get_session().post(**request_args)
+            return self._parse_response(response)
+
+        except Exception as e:
+            print(f"Translation error: {str(e)}")
+
+        return None
+
+    async def _request_translations_async(self, client, texts: List[str], source_lang: str, target_lang: str) -> Optional[List[Optional[str]]]:
+        """_request_translations through an httpx.AsyncClient"""
+        try:
+            request_args = self._build_request(texts, source_lang, target_lang)
+            if request_args is None:
+                return None
+
+            response = await client.post(**request_args)
+            return self._parse_response(response)
+
+        except Exception as e:
+            print(f"Translation error: {str(e)}")
+
+        return None
+
+    def _build_request(self, texts: List[str], source_lang: str, target_lang: str) -> Optional[Dict[str, Any]]:
+        """Keyword arguments for the Translator POST, or None without credentials"""
+        if not self.endpoint or not self.key:
+            print("Azure Translator credentials not found")
+            return None
+
+        # Construct the request
+        constructed_url = self.endpoint + '/translate'
+
+        params = {
+            'api-version': '3.0',
+            'from': source_lang,
+            'to': [target_lang]
+        }
+
+        headers = {
+            'Ocp-Apim-Subscription-Key': self.key,
+            'Ocp-Apim-Subscription-Region': self.region,
+            'Content-type': 'application/json',
+            'X-ClientTraceId': str(uuid.uuid4())
+        }
+
+        # Request body
+        body = [{'text': text} for text in texts]
+
+        return {'url': constructed_url, 'params': params, 'headers': headers, 'json': body}
+
+    def _parse_response(self, response) -> Optional[List[Optional[str]]]:
+        if response.status_code == 200:
+            return [self._first_translation(item) for item in response.json()]
+
+        print(f"Azure Translator API error: {response.status_code}")
+        print(f"Response: {response.text}")
+        return None
+
+    def _first_translation(self, item: Dict[str, Any]) -> Optional[str]:
+        translations = item.get('translations') if item else None
+        if translations:
+            return translations[0]['text']
+        return None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return translation cache hit/miss counters"""
+        return self.cache.stats()